@@ -1,5 +1,7 @@
 import argparse
 import asyncio
+import functools
+import hashlib
 import logging
 import os
 import subprocess
@@ -7,28 +9,33 @@ import sys
 import threading
 import time
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime
 from importlib.metadata import version
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import torch
 import uvicorn
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from download_models import download_required_models
-from lib.pipeline_manager import PipelineManager
 from lib.schema import (
-    HealthResponse,
     PipelineLoadRequest,
     PipelineStatusResponse,
     WebRTCOfferRequest,
     WebRTCOfferResponse,
 )
-from lib.webrtc import WebRTCManager
+
+if TYPE_CHECKING:
+    from lib.pipeline_manager import PipelineManager
+    from lib.webrtc import WebRTCManager
 
 
 class STUNErrorFilter(logging.Filter):
@@ -63,16 +70,54 @@ if os.getenv("VERBOSE_LOGGING"):
 # Select pipeline depending on the "PIPELINE" environment variable
 PIPELINE = os.getenv("PIPELINE", None)
 
+# Package version, looked up once since it walks sys.path for the distribution
+try:
+    PKG_VERSION = version("daydream-scope")
+except Exception:
+    PKG_VERSION = "unknown"
+
+# Frontend build output, resolved once at import so requests don't re-stat it
+FRONTEND_DIST = Path(__file__).resolve().parent / "frontend" / "dist"
+INDEX_FILE = FRONTEND_DIST / "index.html"
+FRONTEND_PRESENT = FRONTEND_DIST.is_dir()
+INDEX_BYTES = (
+    INDEX_FILE.read_bytes() if FRONTEND_PRESENT and INDEX_FILE.is_file() else None
+)
+INDEX_ETAG = (
+    f'"{hashlib.md5(INDEX_BYTES, usedforsecurity=False).hexdigest()}"'
+    if INDEX_BYTES is not None
+    else None
+)
+
+# Cleared when a pipeline load starts and set once it ends, whether it succeeded
+# or failed, so WebRTC offers can wait for the outcome instead of polling
+pipeline_load_done = asyncio.Event()
+# Max time an offer waits for a pipeline that is still loading
+PIPELINE_READY_TIMEOUT = 30.0
+
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
 def get_git_commit_hash() -> str:
     """
     Get the current git commit hash.
 
+    Reads .git/HEAD directly and only falls back to running git for layouts
+    that are not parsed here (eg. packed refs or worktrees).
+
     Returns:
         Git commit hash if available, otherwise a fallback message.
     """
+    git_dir = Path(__file__).parent / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if head.startswith("ref: "):
+            head = (git_dir / head[5:]).read_text().strip()
+        return head[:7]
+    except OSError:
+        pass
+
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--short", "HEAD"],
@@ -95,44 +140,86 @@ def get_git_commit_hash() -> str:
 
 def print_version_info():
     """Print version information and exit."""
-    try:
-        pkg_version = version("daydream-scope")
-    except Exception:
-        pkg_version = "unknown"
-
     git_hash = get_git_commit_hash()
 
-    print(f"daydream-scope: {pkg_version}")
+    print(f"daydream-scope: {PKG_VERSION}")
     print(f"git commit: {git_hash}")
 
 
+def index_html_response(if_none_match: str | None) -> Response:
+    """Serve the cached index.html, answering 304 when the client copy is current."""
+    headers = {"ETag": INDEX_ETAG, "Cache-Control": "no-cache"}
+    if if_none_match and INDEX_ETAG in (
+        tag.strip() for tag in if_none_match.split(",")
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(INDEX_BYTES, media_type="text/html", headers=headers)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files with content-hashed names that browsers may cache forever."""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class SPAStaticFiles(StaticFiles):
+    """Static files that fall back to index.html for client-side routes."""
+
+    async def get_response(self, path: str, scope):
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as e:
+            if e.status_code != 404 or INDEX_BYTES is None:
+                raise
+            return index_html_response(Headers(scope=scope).get("if-none-match"))
+
+
 def configure_static_files():
     """Configure static file serving for production."""
-    frontend_dist = Path(__file__).parent / "frontend" / "dist"
-    if frontend_dist.exists():
+    if FRONTEND_PRESENT:
         app.mount(
-            "/assets", StaticFiles(directory=frontend_dist / "assets"), name="assets"
+            "/assets",
+            ImmutableStaticFiles(directory=FRONTEND_DIST / "assets"),
+            name="assets",
         )
-        logger.info(f"Serving static assets from {frontend_dist / 'assets'}")
+        logger.info(f"Serving static assets from {FRONTEND_DIST / 'assets'}")
+
+        # Must be mounted after all API routes are registered so they take precedence
+        app.mount("/", SPAStaticFiles(directory=FRONTEND_DIST, html=True), name="spa")
     else:
         logger.info("Frontend dist directory not found - running in development mode")
 
 
 # Global WebRTC manager instance
-webrtc_manager = None
+# Handlers read these directly since they are set once in lifespan
+webrtc_manager: "WebRTCManager | None" = None
 # Global pipeline manager instance
-pipeline_manager = None
+pipeline_manager: "PipelineManager | None" = None
+
+
+# Pre-warming gets its own thread so that weight loading and kernel compilation
+# never compete with the default executor used by request handlers
+prewarm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prewarm")
+# Only one pre-warm may run at a time
+prewarm_lock = asyncio.Lock()
 
 
 async def prewarm_pipeline(pipeline_id: str):
     """Background task to pre-warm the pipeline without blocking startup."""
-    try:
-        await asyncio.wait_for(
-            pipeline_manager.load_pipeline(pipeline_id),
-            timeout=300,  # 5 minute timeout for pipeline loading
-        )
-    except Exception as e:
-        logger.error(f"Error pre-warming pipeline {pipeline_id} in background: {e}")
+    async with prewarm_lock:
+        pipeline_load_done.clear()
+        try:
+            await asyncio.wait_for(
+                pipeline_manager.load_pipeline(pipeline_id, executor=prewarm_executor),
+                timeout=300,  # 5 minute timeout for pipeline loading
+            )
+        except Exception as e:
+            logger.error(f"Error pre-warming pipeline {pipeline_id} in background: {e}")
+        finally:
+            pipeline_load_done.set()
 
 
 @asynccontextmanager
@@ -141,6 +228,13 @@ async def lifespan(app: FastAPI):
     # Startup
     global webrtc_manager, pipeline_manager
 
+    # torch (and the managers that depend on it) are imported here rather than
+    # at module scope so that CLI paths like --version start quickly
+    import torch
+
+    from lib.pipeline_manager import PipelineManager
+    from lib.webrtc import WebRTCManager
+
     # Check CUDA availability before proceeding
     if not torch.cuda.is_available():
         error_msg = (
@@ -151,12 +245,21 @@ async def lifespan(app: FastAPI):
         logger.error(error_msg)
         sys.exit(1)
 
-    # Download models if needed
-    try:
-        download_required_models()
-    except Exception as e:
-        logger.error(f"Failed to download models: {e}")
+    # Download models if needed and initialize the WebRTC manager concurrently
+    # (both on worker threads to keep the event loop free)
+    download_result, webrtc_result = await asyncio.gather(
+        asyncio.to_thread(download_required_models),
+        asyncio.to_thread(WebRTCManager),
+        return_exceptions=True,
+    )
+    if isinstance(download_result, Exception):
+        logger.error(f"Failed to download models: {download_result}")
         sys.exit(1)
+    if isinstance(webrtc_result, Exception):
+        raise webrtc_result
+
+    webrtc_manager = webrtc_result
+    logger.info("WebRTC manager initialized")
 
     # Initialize pipeline manager (but don't load pipeline yet)
     pipeline_manager = PipelineManager()
@@ -166,9 +269,6 @@ async def lifespan(app: FastAPI):
     if PIPELINE is not None:
         asyncio.create_task(prewarm_pipeline(PIPELINE))
 
-    webrtc_manager = WebRTCManager()
-    logger.info("WebRTC manager initialized")
-
     yield
 
     # Shutdown
@@ -182,22 +282,15 @@ async def lifespan(app: FastAPI):
         pipeline_manager.unload_pipeline()
         logger.info("Pipeline manager shutdown complete")
 
-
-def get_webrtc_manager() -> WebRTCManager:
-    """Dependency to get WebRTC manager instance."""
-    return webrtc_manager
-
-
-def get_pipeline_manager() -> PipelineManager:
-    """Dependency to get pipeline manager instance."""
-    return pipeline_manager
+    prewarm_executor.shutdown(wait=False, cancel_futures=True)
 
 
 app = FastAPI(
     lifespan=lifespan,
     title="Scope",
     description="A tool for running and customizing real-time, interactive generative AI pipelines and models",
-    version=version("daydream-scope"),
+    version=PKG_VERSION,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -208,36 +301,46 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is the outermost middleware and compresses every text response
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
 
 
-@app.get("/health", response_model=HealthResponse)
+# (unix seconds, isoformat) of the last health check timestamp
+_health_timestamp: tuple[int, str] = (0, "")
+
+
+def get_health_timestamp() -> str:
+    """Get the current time as an ISO string, recomputed at most once per second."""
+    global _health_timestamp
+    now = int(time.time())
+    if now != _health_timestamp[0]:
+        _health_timestamp = (now, datetime.fromtimestamp(now).isoformat())
+    return _health_timestamp[1]
+
+
+@app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(status="healthy", timestamp=datetime.now().isoformat())
+    # Plain dict instead of HealthResponse to skip validation on every probe
+    return {"status": "healthy", "timestamp": get_health_timestamp()}
 
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve the frontend at the root URL."""
-    frontend_dist = Path(__file__).parent / "frontend" / "dist"
-
     # Only serve SPA if frontend dist exists (production mode)
-    if not frontend_dist.exists():
+    if not FRONTEND_PRESENT:
         return {"message": "Scope API - Frontend not built"}
 
     # Serve the frontend index.html
-    index_file = frontend_dist / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file)
+    if INDEX_BYTES is not None:
+        return index_html_response(request.headers.get("if-none-match"))
 
     return {"message": "Scope API - Frontend index.html not found"}
 
 
 @app.post("/api/v1/pipeline/load")
-async def load_pipeline(
-    request: PipelineLoadRequest,
-    pipeline_manager: PipelineManager = Depends(get_pipeline_manager),
-):
+async def load_pipeline(request: PipelineLoadRequest):
     """Load a pipeline."""
     try:
         # Convert pydantic model to dict for pipeline manager
@@ -245,9 +348,13 @@ async def load_pipeline(
         if request.load_params:
             load_params_dict = request.load_params.model_dump()
 
-        success = await pipeline_manager.load_pipeline(
-            request.pipeline_id, load_params_dict
-        )
+        pipeline_load_done.clear()
+        try:
+            success = await pipeline_manager.load_pipeline(
+                request.pipeline_id, load_params_dict
+            )
+        finally:
+            pipeline_load_done.set()
         if success:
             return {"message": "Pipeline loading initiated successfully"}
         else:
@@ -261,9 +368,7 @@ async def load_pipeline(
 
 
 @app.get("/api/v1/pipeline/status", response_model=PipelineStatusResponse)
-async def get_pipeline_status(
-    pipeline_manager: PipelineManager = Depends(get_pipeline_manager),
-):
+async def get_pipeline_status():
     """Get current pipeline status."""
     try:
         status_info = pipeline_manager.get_status_info()
@@ -274,13 +379,26 @@ async def get_pipeline_status(
 
 
 @app.post("/api/v1/webrtc/offer", response_model=WebRTCOfferResponse)
-async def handle_webrtc_offer(
-    request: WebRTCOfferRequest,
-    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
-    pipeline_manager: PipelineManager = Depends(get_pipeline_manager),
-):
+async def handle_webrtc_offer(request: WebRTCOfferRequest):
     """Handle WebRTC offer and return answer."""
+    # Already imported by lifespan, so this is only a module lookup
+    from lib.pipeline_manager import PipelineStatus
+
     try:
+        # Wait for a pipeline that is still loading instead of making the client
+        # poll, the status is read without the lock a load holds until it finishes.
+        # A failed load also ends the wait and is rejected by the check below
+        if pipeline_manager.status == PipelineStatus.LOADING:
+            try:
+                await asyncio.wait_for(
+                    pipeline_load_done.wait(), timeout=PIPELINE_READY_TIMEOUT
+                )
+            except asyncio.TimeoutError as e:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Pipeline not ready. Please load pipeline first.",
+                ) from e
+
         # Ensure pipeline is loaded before proceeding
         if not pipeline_manager.is_loaded():
             raise HTTPException(
@@ -290,38 +408,37 @@ async def handle_webrtc_offer(
 
         return await webrtc_manager.handle_offer(request, pipeline_manager)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error handling WebRTC offer: {e}")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@app.get("/{path:path}")
-async def serve_frontend(request: Request, path: str):
-    """Serve the frontend for all non-API routes (fallback for client-side routing)."""
-    frontend_dist = Path(__file__).parent / "frontend" / "dist"
+# Configure static file serving at import time rather than in main(), so the mounts
+# exist whichever way uvicorn imports the app, after all API routes are registered
+configure_static_files()
 
-    # Only serve SPA if frontend dist exists (production mode)
-    if not frontend_dist.exists():
-        raise HTTPException(status_code=404, detail="Frontend not built")
 
-    # Check if requesting a specific file that exists
-    file_path = frontend_dist / path
-    if file_path.exists() and file_path.is_file():
-        return FileResponse(file_path)
+class NotifyingServer(uvicorn.Server):
+    """uvicorn server that sets an event once startup has completed."""
 
-    # Fallback to index.html for SPA routing
-    index_file = frontend_dist / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file)
+    def __init__(self, config: uvicorn.Config, started_event: threading.Event):
+        super().__init__(config)
+        self.started_event = started_event
 
-    raise HTTPException(status_code=404, detail="Frontend index.html not found")
+    async def startup(self, sockets=None) -> None:
+        # Lifespan startup runs first and the sockets are listening once this
+        # returns, unless startup failed and asked the server to exit
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            self.started_event.set()
 
 
-def open_browser_when_ready(host: str, port: int, server):
+def open_browser_when_ready(host: str, port: int, started_event: threading.Event):
     """Open browser when server is ready, with fallback to URL logging."""
-    # Wait for server to be ready
-    while not getattr(server, "started", False):
-        time.sleep(0.1)
+    # Wait for the server to finish startup and start listening
+    started_event.wait()
 
     # Determine the URL to open
     url = (
@@ -370,24 +487,28 @@ def main():
         print_version_info()
         sys.exit(0)
 
-    # Configure static file serving
-    configure_static_files()
+    # Use uvloop and the httptools parser for lower per-request overhead
+    # uvloop is not available on Windows so fall back to the asyncio loop there
+    server_options = {
+        "host": args.host,
+        "port": args.port,
+        "reload": args.reload,
+        "loop": "asyncio" if sys.platform == "win32" else "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+    }
 
     # Check if we're in production mode (frontend dist exists)
-    frontend_dist = Path(__file__).parent / "frontend" / "dist"
-    is_production = frontend_dist.exists()
-
-    if is_production:
+    if FRONTEND_PRESENT:
         # Create server instance for production mode
-        config = uvicorn.Config(
-            "app:app", host=args.host, port=args.port, reload=args.reload
-        )
-        server = uvicorn.Server(config)
+        config = uvicorn.Config(app, **server_options)
+        started_event = threading.Event()
+        server = NotifyingServer(config, started_event)
 
         # Start browser opening thread
         browser_thread = threading.Thread(
             target=open_browser_when_ready,
-            args=(args.host, args.port, server),
+            args=(args.host, args.port, started_event),
             daemon=True,
         )
         browser_thread.start()
@@ -399,7 +520,8 @@ def main():
             pass  # Clean shutdown on Ctrl+C
     else:
         # Development mode - just run normally
-        uvicorn.run("app:app", host=args.host, port=args.port, reload=args.reload)
+        # Reload restarts the server in a subprocess, which needs an import string
+        uvicorn.run("app:app" if args.reload else app, **server_options)
 
 
 if __name__ == "__main__":
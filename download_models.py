@@ -6,24 +6,68 @@ Cross-platform model downloader using underlying libraries:
 Downloads:
   1) hf download Wan-AI/Wan2.1-T2V-1.3B --local-dir models/Wan2.1-T2V-1.3B --exclude ...
   2) hf download Kijai/WanVideo_comfy umt5-xxl-enc-fp8_e4m3fn.safetensors --local-dir models/WanVideo_comfy
-  3) gdown <file_id> -> model.pt
-  4) mv model.pt -> models/StreamDiffusionV2/model.pt
+  3) gdown <file_id> -> models/StreamDiffusionV2/model.pt.part
+  4) rename model.pt.part -> models/StreamDiffusionV2/model.pt
   5) hf download Efficient-Large-Model/LongLive-1.3B --local-dir models/LongLive-1.3B
+
+The HF downloads (1, 2, 5) and the Google Drive download (3, 4) target independent
+destinations and run concurrently on a thread pool, the first failure is reported
+as soon as it happens. The pool size can be set with the SCOPE_DOWNLOAD_PARALLELISM
+environment variable.
 """
 
+import json
 import logging
-import shutil
+import os
 import sys
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
 
 from lib.models_config import (
     ensure_models_dir,
+    get_models_dir,
+    get_required_model_files,
     models_are_downloaded,
 )
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Use the Rust-backed hf_transfer client for HF downloads unless explicitly disabled
+# Must be set before huggingface_hub is imported
+os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+# Environment variable for overriding the number of files fetched in parallel per HF repo
+HF_MAX_WORKERS_ENV_VAR = "HF_MAX_WORKERS"
+DEFAULT_HF_MAX_WORKERS = 8
+
+# Written into each download dir once a download completes, containing the revision
+DOWNLOAD_MARKER_FILENAME = ".scope_download_complete"
+
+# Written into the models dir once all required models are downloaded, containing a
+# JSON manifest of what was fetched. The marker only counts while its manifest
+# matches the current one, so changing the required files or revision re-checks
+# existing installs
+MODELS_READY_MARKER_FILENAME = ".scope_models_ready.v1"
+
+# HuggingFace repos and the revision they are downloaded at
+HF_REVISION = "main"
+WAN_VIDEO_REPO = "Wan-AI/Wan2.1-T2V-1.3B"
+WAN_VIDEO_COMFY_REPO = "Kijai/WanVideo_comfy"
+WAN_VIDEO_COMFY_FILE = "umt5-xxl-enc-fp8_e4m3fn.safetensors"
+LONGLIVE_REPO = "Efficient-Large-Model/LongLive-1.3B"
+
+# Google Drive file for the StreamDiffusionV2 checkpoint
+STREAM_DIFFUSION_GDRIVE_ID = "1-2pZ01uq2l_ulj-aBP1i8Fh10y6Zklyk"
+
+# Google Drive downloads are resumed and retried with exponential backoff
+GDRIVE_DOWNLOAD_ATTEMPTS = 3
+
+# Environment variable for overriding the number of concurrent downloads
+DOWNLOAD_PARALLELISM_ENV_VAR = "SCOPE_DOWNLOAD_PARALLELISM"
+DEFAULT_DOWNLOAD_PARALLELISM = 4
+
 # --- third-party libs ---
 try:
     from huggingface_hub import hf_hub_download, snapshot_download
@@ -41,37 +85,67 @@ except Exception:
     raise
 
 
+def is_download_complete(local_dir: Path, revision: str) -> bool:
+    """
+    Check whether a previous download into local_dir completed for this revision.
+    """
+    marker = local_dir / DOWNLOAD_MARKER_FILENAME
+    try:
+        return marker.read_text().strip() == revision
+    except FileNotFoundError:
+        return False
+
+
+def mark_download_complete(local_dir: Path, revision: str) -> None:
+    """
+    Record that a download into local_dir completed for this revision.
+    """
+    (local_dir / DOWNLOAD_MARKER_FILENAME).write_text(revision)
+
+
 def download_hf_repo_excluding(
-    repo_id: str, local_dir: Path, ignore_patterns: list[str]
+    repo_id: str, local_dir: Path, ignore_patterns: list[str], revision: str = "main"
 ) -> None:
     """
     Download an entire HF repo snapshot while excluding specific files.
     """
+    if is_download_complete(local_dir, revision):
+        print(f"[SKIP] Repo '{repo_id}' already downloaded to: {local_dir}")
+        return
+
     local_dir.mkdir(parents=True, exist_ok=True)
     # snapshot_download supports exclude via `ignore_patterns`
     # (patterns are glob-like, relative to the repo root)
     snapshot_download(
         repo_id=repo_id,
         local_dir=str(local_dir),
-        local_dir_use_symlinks=False,  # copy files for portability
         ignore_patterns=ignore_patterns,
+        revision=revision,
+        max_workers=get_hf_max_workers(),
         # token is picked up automatically from HUGGINGFACE_TOKEN if set
-        # revision=None,  # optionally pin a commit/tag if you like
     )
+    mark_download_complete(local_dir, revision)
     print(f"[OK] Downloaded repo '{repo_id}' to: {local_dir}")
 
 
-def download_hf_single_file(repo_id: str, filename: str, local_dir: Path) -> None:
+def download_hf_single_file(
+    repo_id: str, filename: str, local_dir: Path, revision: str = "main"
+) -> None:
     """
     Download a single file from an HF repo into a target folder.
     """
+    if is_download_complete(local_dir, revision) and (local_dir / filename).exists():
+        print(f"[SKIP] File '{filename}' already downloaded to: {local_dir}")
+        return
+
     local_dir.mkdir(parents=True, exist_ok=True)
     out_path = hf_hub_download(
         repo_id=repo_id,
         filename=filename,
         local_dir=str(local_dir),
-        local_dir_use_symlinks=False,
+        revision=revision,
     )
+    mark_download_complete(local_dir, revision)
     print(f"[OK] Downloaded file '{filename}' from '{repo_id}' to: {out_path}")
 
 
@@ -82,25 +156,93 @@ def download_from_gdrive(file_id: str, output_path: Path) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     url = f"https://drive.google.com/uc?id={file_id}"
     print(f"[..] Downloading from Google Drive ID={file_id} -> {output_path}")
-    downloaded = gdown.download(url=url, output=str(output_path), quiet=False)
-    if not downloaded or not output_path.exists():
-        raise RuntimeError(f"Failed to download Google Drive file (ID={file_id}).")
-    print(f"[OK] Downloaded Google Drive file to: {output_path}")
+    for attempt in range(GDRIVE_DOWNLOAD_ATTEMPTS):
+        try:
+            # resume=True continues a partial download left by a failed attempt
+            downloaded = gdown.download(
+                url=url,
+                output=str(output_path),
+                quiet=False,
+                resume=True,
+                fuzzy=True,
+            )
+            if downloaded and output_path.exists():
+                print(f"[OK] Downloaded Google Drive file to: {output_path}")
+                return
+        except Exception as e:
+            logger.warning(
+                f"Google Drive download attempt {attempt + 1}/{GDRIVE_DOWNLOAD_ATTEMPTS} failed: {e}"
+            )
+
+        if attempt < GDRIVE_DOWNLOAD_ATTEMPTS - 1:
+            time.sleep(2**attempt)
+
+    raise RuntimeError(f"Failed to download Google Drive file (ID={file_id}).")
 
 
-def move_file(src: Path, dst: Path) -> None:
+def download_gdrive_model(file_id: str, dst: Path) -> None:
     """
-    Move a file to a destination path, creating directories as needed.
+    Download a Google Drive file to a .part file next to dst and move it into place.
     """
-    if not src.exists():
-        raise FileNotFoundError(f"Source file not found: {src}")
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    shutil.move(str(src), str(dst))
-    print(f"[OK] Moved '{src}' -> '{dst}'")
+    if dst.exists():
+        print(f"[SKIP] Model already exists at: {dst}")
+        return
+
+    tmp_model = dst.with_suffix(dst.suffix + ".part")
+    download_from_gdrive(file_id, tmp_model)
+
+    # Same filesystem, so this is a rename rather than a copy
+    tmp_model.rename(dst)
+    print(f"[OK] Moved '{tmp_model}' -> '{dst}'")
+
+
+def _env_positive_int(name: str, default: int) -> int:
+    """Read a positive int from an environment variable, clamping values below 1."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(f"Invalid {name}={value!r}, using {default}")
+        return default
+
+
+def get_download_parallelism() -> int:
+    """Get the max number of concurrent downloads."""
+    return _env_positive_int(DOWNLOAD_PARALLELISM_ENV_VAR, DEFAULT_DOWNLOAD_PARALLELISM)
+
+
+def get_hf_max_workers() -> int:
+    """Get the max number of concurrent file downloads within one HF repo."""
+    return _env_positive_int(HF_MAX_WORKERS_ENV_VAR, DEFAULT_HF_MAX_WORKERS)
+
+
+def get_models_manifest() -> dict:
+    """Get the manifest recorded in the models ready marker for the current setup."""
+    models_dir = get_models_dir()
+    return {
+        "revision": HF_REVISION,
+        "huggingface": [WAN_VIDEO_REPO, WAN_VIDEO_COMFY_REPO, LONGLIVE_REPO],
+        "gdrive": [STREAM_DIFFUSION_GDRIVE_ID],
+        "required_files": [
+            path.relative_to(models_dir).as_posix()
+            for path in get_required_model_files()
+        ],
+    }
 
 
 def check_models_downloaded() -> bool:
     """Check if required model files are already downloaded."""
+    # A single read of the marker instead of checking every required file, as long
+    # as it was written for the current required files and revision
+    marker = get_models_dir() / MODELS_READY_MARKER_FILENAME
+    try:
+        if json.loads(marker.read_text()) == get_models_manifest():
+            return True
+    except (OSError, ValueError):
+        # Missing or corrupt marker
+        pass
     return models_are_downloaded()
 
 
@@ -120,15 +262,6 @@ def download_required_models():
 
 
 def download_models() -> None:
-    # HuggingFace repos
-    wan_video_repo = "Wan-AI/Wan2.1-T2V-1.3B"
-    wan_video_comfy_repo = "Kijai/WanVideo_comfy"
-    wan_video_comfy_file = "umt5-xxl-enc-fp8_e4m3fn.safetensors"
-    longlive_repo = "Efficient-Large-Model/LongLive-1.3B"
-
-    # Google Drive file
-    stream_diffusion_gdrive_id = "1-2pZ01uq2l_ulj-aBP1i8Fh10y6Zklyk"
-
     # Ensure models directory exists and get paths
     models_root = ensure_models_dir()
     wan_video_dst = models_root / "Wan2.1-T2V-1.3B"
@@ -138,29 +271,53 @@ def download_models() -> None:
 
     # 1) HF repo download excluding a large file
     wan_video_exclude = ["models_t5_umt5-xxl-enc-bf16.pth"]
-    download_hf_repo_excluding(
-        wan_video_repo, wan_video_dst, ignore_patterns=wan_video_exclude
-    )
 
-    # 2) HF single file download into a folder
-    download_hf_single_file(
-        wan_video_comfy_repo, wan_video_comfy_file, wan_video_comfy_dst
+    executor = ThreadPoolExecutor(
+        max_workers=get_download_parallelism(), thread_name_prefix="download"
     )
+    try:
+        futures = [
+            executor.submit(
+                download_hf_repo_excluding,
+                WAN_VIDEO_REPO,
+                wan_video_dst,
+                wan_video_exclude,
+                HF_REVISION,
+            ),
+            # 2) HF single file download into a folder
+            executor.submit(
+                download_hf_single_file,
+                WAN_VIDEO_COMFY_REPO,
+                WAN_VIDEO_COMFY_FILE,
+                wan_video_comfy_dst,
+                HF_REVISION,
+            ),
+            # 5) HF repo download for LongLive-1.3B
+            executor.submit(
+                download_hf_repo_excluding,
+                LONGLIVE_REPO,
+                longlive_dst,
+                [],
+                HF_REVISION,
+            ),
+            # 3) Google Drive download -> model.pt.part, 4) renamed to model.pt
+            executor.submit(
+                download_gdrive_model, STREAM_DIFFUSION_GDRIVE_ID, stream_diffusion_dst
+            ),
+        ]
 
-    # 3) Google Drive download -> model.pt in repo root
-    if stream_diffusion_dst.exists():
-        print(
-            f"[SKIP] StreamDiffusionV2 model already exists at: {stream_diffusion_dst}"
-        )
-    else:
-        tmp_model = Path("model.pt")
-        download_from_gdrive(stream_diffusion_gdrive_id, tmp_model)
-
-        # 4) Move to StreamDiffusionV2/model.pt
-        move_file(tmp_model, stream_diffusion_dst)
+        # Surface the first failure as soon as any download raises
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            future.result()
+    finally:
+        # Skip downloads that have not started and don't block on running ones,
+        # which a with block would wait for before the error propagates
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    # 5) HF repo download for LongLive-1.3B
-    download_hf_repo_excluding(longlive_repo, longlive_dst, ignore_patterns=[])
+    (models_root / MODELS_READY_MARKER_FILENAME).write_text(
+        json.dumps(get_models_manifest(), indent=2)
+    )
 
     print("\nAll downloads complete.")
 
@@ -65,30 +65,34 @@ export function useWebRTC(options?: UseWebRTCOptions) {
 
           try {
             const data = JSON.parse(event.data);
-
-            // Handle stream stop notification from backend
-            if (data.type === "stream_stopped") {
-              console.log("Stream stopped by backend, updating UI");
-              setIsStreaming(false);
-              setIsConnecting(false);
-              setRemoteStream(null);
-
-              // Show error toast if there's an error message
-              if (data.error_message) {
-                toast.error("Stream Error", {
-                  description: data.error_message,
-                  duration: 5000,
-                });
-              }
-
-              // Close the peer connection to clean up
-              if (peerConnectionRef.current) {
-                peerConnectionRef.current.close();
-                peerConnectionRef.current = null;
-              }
-              // Notify parent component
-              if (options?.onStreamStop) {
-                options.onStreamStop();
+            // Notifications sent in the same burst arrive as a single batch
+            const messages = data.type === "batch" ? data.messages : [data];
+
+            for (const message of messages) {
+              // Handle stream stop notification from backend
+              if (message.type === "stream_stopped") {
+                console.log("Stream stopped by backend, updating UI");
+                setIsStreaming(false);
+                setIsConnecting(false);
+                setRemoteStream(null);
+
+                // Show error toast if there's an error message
+                if (message.error_message) {
+                  toast.error("Stream Error", {
+                    description: message.error_message,
+                    duration: 5000,
+                  });
+                }
+
+                // Close the peer connection to clean up
+                if (peerConnectionRef.current) {
+                  peerConnectionRef.current.close();
+                  peerConnectionRef.current = null;
+                }
+                // Notify parent component
+                if (options?.onStreamStop) {
+                  options.onStreamStop();
+                }
               }
             }
           } catch (error) {
@@ -1,14 +1,17 @@
 import logging
 import queue
+import sys
 import threading
 import time
-from collections import deque
 from typing import Any
 
+import numpy as np
 import torch
 from aiortc.mediastreams import VideoFrame
+from av.video.reformatter import VideoReformatter
 
 from .pipeline_manager import PipelineManager, PipelineNotAvailableException
+from .ring_buffer import SPSCRing
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +29,10 @@ PREPARE_ONLY_PARAMS = frozenset(
 
 # Multiply the # of output frames from pipeline by this to get the max size of the output queue
 OUTPUT_QUEUE_MAX_SIZE_FACTOR = 3
+# Slots allocated up front for the output queue so that it can grow without copying
+OUTPUT_QUEUE_CAPACITY = 128
+# With drop_stale_output, output beyond this many pipeline calls' worth is dropped
+STALE_OUTPUT_CHUNKS = 2
 
 # FPS calculation constants
 MIN_FPS = 1.0  # Minimum FPS to prevent division by zero
@@ -33,6 +40,18 @@ MAX_FPS = 60.0  # Maximum FPS cap
 DEFAULT_FPS = 30.0  # Default FPS
 SLEEP_TIME = 0.01
 
+# Output pixel formats, yuv420p is what the WebRTC encoders consume
+OUTPUT_FORMATS = ("rgb24", "yuv420p")
+# BT.601 limited range RGB to YUV matrix for [0, 255] RGB, same as swscale's default
+YUV_FROM_RGB = (
+    (0.257, 0.504, 0.098),
+    (-0.148, -0.291, 0.439),
+    (0.439, -0.368, -0.071),
+)
+# YUV offsets plus 0.5 since the uint8 cast truncates
+LUMA_OFFSET = 16.5
+CHROMA_OFFSET = 128.5
+
 
 class FrameProcessor:
     def __init__(
@@ -43,15 +62,65 @@ class FrameProcessor:
         max_buffer_size: int = 30,
         initial_parameters: dict = None,
         notification_callback: callable = None,
+        output_ready_callback: callable = None,
+        fps_callback: callable = None,
+        output_format: str = "rgb24",
+        drop_stale_output: bool = True,
     ):
-        self.pipeline_manager = pipeline_manager
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unsupported output format {output_format}, expected one of {OUTPUT_FORMATS}"
+            )
 
-        self.frame_buffer = deque(maxlen=max_buffer_size)
-        self.frame_buffer_lock = threading.Lock()
-        self.output_queue = queue.Queue(maxsize=max_output_queue_size)
+        self.pipeline_manager = pipeline_manager
+        self.output_format = output_format
+
+        # Input frames are produced by the track's input loop and consumed by the
+        # worker thread, output frames the other way round, so both are SPSC rings
+        # When the worker falls behind the oldest input frames are overwritten so the
+        # buffer always holds the most recent max_buffer_size frames
+        self.frame_buffer = SPSCRing(maxsize=max_buffer_size, overwrite=True)
+        self.output_queue = SPSCRing(
+            maxsize=max_output_queue_size, capacity=OUTPUT_QUEUE_CAPACITY
+        )
+        # Pinned THWC uint8 staging buffer for input chunks and the device buffer it
+        # is uploaded into, both reused across chunks
+        self._chunk_buffer: torch.Tensor | None = None
+        self._gpu_chunk: torch.Tensor | None = None
+        self._upload_event: torch.cuda.Event | None = None
+        # Shared by all input frames so the swscale context is reused between frames
+        # instead of being recreated by every VideoFrame.to_ndarray() call
+        self._reformatter = VideoReformatter()
+        # Device buffers for converting pipeline output to uint8, the conversion is
+        # captured in a CUDA graph once the output shape is stable
+        self._output_input: torch.Tensor | None = None
+        self._output_scratch: torch.Tensor | None = None
+        self._output_u8: torch.Tensor | None = None
+        self._output_graph: torch.cuda.CUDAGraph | None = None
+        # Set when capturing failed so the current shape keeps running eagerly
+        self._output_graph_failed = False
+        # Set on the output device while output is converted to yuv420p
+        self._yuv_matrix: torch.Tensor | None = None
+        # Dedicated stream for device to host copies of the output so the next
+        # pipeline call can start while the previous output is still transferring
+        self._copy_stream: torch.cuda.Stream | None = None
+        self._copy_event: torch.cuda.Event | None = None
+        # With drop_stale_output get() keeps at most STALE_OUTPUT_CHUNKS pipeline
+        # calls' worth of frames queued, so a consumer that falls behind catches up
+        # instead of building up latency, while the usual scheduling jitter of
+        # finding the next chunk queued before the current one is drained doesn't
+        # skip frames at every chunk boundary
+        self.drop_stale_output = drop_stale_output
+        # Number of frames produced by the latest pipeline call
+        self._output_chunk_size = 0
 
         # Current parameters used by processing thread
-        self.parameters = initial_parameters or {}
+        self.parameters = {}
+        # One-shot reset_cache request, kept out of self.parameters along with
+        # paused so the steady state path does no dict operations
+        self._reset_cache_requested = False
+        self.paused = False
+        self._apply_parameters(initial_parameters or {})
         # Queue for parameter updates from external threads
         self.parameters_queue = queue.Queue(maxsize=max_parameter_queue_size)
 
@@ -59,24 +128,35 @@ class FrameProcessor:
         self.shutdown_event = threading.Event()
         self.running = False
 
+        # Signals the worker when enough frames are buffered, parameters change or
+        # the processor stops, so it doesn't have to poll
+        self._work_available = threading.Condition()
+        # Number of buffered frames the worker is waiting for, sys.maxsize if it
+        # isn't waiting for frames so that put() skips the notification
+        self._frames_needed = sys.maxsize
+
         self.is_prepared = False
 
         # Callback to notify when frame processor stops
         self.notification_callback = notification_callback
+        # Called from the worker thread whenever new output frames are queued
+        self.output_ready_callback = output_ready_callback
+        # Called from the worker thread with the new value whenever the pipeline FPS
+        # estimate changes
+        self.fps_callback = fps_callback
 
         # FPS tracking variables
-        self.processing_time_per_frame = deque(
-            maxlen=2
-        )  # Keep last 2 processing_time/num_frames values for averaging
-        self.last_fps_update = time.time()
-        self.fps_update_interval = 0.5  # Update FPS every 0.5 seconds
+        # Exponential moving average of processing time per frame in nanoseconds
+        self._ema_ns_per_frame = 0.0
+        self._fps_alpha = 0.5  # Weight of the newest measurement
+        # Monotonic integer timestamps avoid float math on every chunk
+        self.last_fps_update_ns = time.monotonic_ns()
+        self.fps_update_interval_ns = 500_000_000  # Update FPS every 0.5 seconds
         self.min_fps = MIN_FPS
         self.max_fps = MAX_FPS
         self.current_pipeline_fps = DEFAULT_FPS
         self.fps_lock = threading.Lock()  # Lock for thread-safe FPS updates
 
-        self.paused = False
-
     def start(self):
         if self.running:
             return
@@ -94,20 +174,15 @@ class FrameProcessor:
 
         self.running = False
         self.shutdown_event.set()
+        self._notify_worker()
 
         if self.worker_thread and self.worker_thread.is_alive():
             # Don't join if we're calling stop() from within the worker thread
             if threading.current_thread() != self.worker_thread:
                 self.worker_thread.join(timeout=5.0)
 
-        while not self.output_queue.empty():
-            try:
-                self.output_queue.get_nowait()
-            except queue.Empty:
-                break
-
-        with self.frame_buffer_lock:
-            self.frame_buffer.clear()
+        self.output_queue.clear()
+        self.frame_buffer.clear()
 
         logger.info("FrameProcessor stopped")
 
@@ -125,60 +200,90 @@ class FrameProcessor:
         if not self.running:
             return False
 
-        with self.frame_buffer_lock:
-            self.frame_buffer.append(frame)
-            return True
+        # If the worker has fallen behind this replaces the oldest buffered frame, so
+        # stale frames are dropped rather than adding latency
+        self.frame_buffer.try_put(frame)
+
+        # Wake the worker once there are enough frames for its next chunk
+        if len(self.frame_buffer) >= self._frames_needed:
+            self._notify_worker()
+        return True
 
     def get(self) -> torch.Tensor | None:
+        """
+        Get the next processed frame as a uint8 CPU tensor, or None if there is none.
+
+        Frames are HWC RGB, or with output_format yuv420p a (H * 3 / 2, W) tensor
+        holding the Y, U and V planes back to back like PyAV's yuv420p ndarrays.
+        yuv420p output is only produced on CUDA for even frame sizes, so callers
+        must handle both layouts.
+
+        With drop_stale_output, frames beyond STALE_OUTPUT_CHUNKS pipeline calls'
+        worth are discarded first, oldest first.
+        """
         if not self.running:
             return None
 
-        try:
-            return self.output_queue.get_nowait()
-        except queue.Empty:
+        if self.drop_stale_output:
+            max_queued = STALE_OUTPUT_CHUNKS * self._output_chunk_size
+            stale = len(self.output_queue) - max_queued
+            if stale > 0:
+                self.output_queue.skip(stale)
+
+        item = self.output_queue.try_get()
+        if item is None:
             return None
 
+        frame, copy_event = item
+        if copy_event is not None:
+            # The copy is normally long done by the time a frame is consumed
+            copy_event.synchronize()
+        return frame
+
     def get_current_pipeline_fps(self) -> float:
         """Get the current dynamically calculated pipeline FPS"""
         with self.fps_lock:
             return self.current_pipeline_fps
 
-    def _calculate_pipeline_fps(self, start_time: float, num_frames: int):
+    def _calculate_pipeline_fps(self, start_ns: int, num_frames: int):
         """Calculate FPS based on processing time and number of frames created"""
-        processing_time = time.time() - start_time
-        if processing_time <= 0 or num_frames <= 0:
+        now_ns = time.monotonic_ns()
+        processing_ns = now_ns - start_ns
+        if processing_ns <= 0 or num_frames <= 0:
             return
 
-        # Store processing time per frame for averaging
-        time_per_frame = processing_time / num_frames
-        self.processing_time_per_frame.append(time_per_frame)
+        # Smooth the processing time per frame
+        ns_per_frame = processing_ns / num_frames
+        if self._ema_ns_per_frame:
+            ns_per_frame = (
+                self._ema_ns_per_frame * (1 - self._fps_alpha)
+                + ns_per_frame * self._fps_alpha
+            )
+        self._ema_ns_per_frame = ns_per_frame
 
         # Update FPS if enough time has passed
-        current_time = time.time()
-        if current_time - self.last_fps_update >= self.fps_update_interval:
-            if len(self.processing_time_per_frame) >= 1:
-                # Calculate average processing time per frame
-                avg_time_per_frame = sum(self.processing_time_per_frame) / len(
-                    self.processing_time_per_frame
-                )
+        if now_ns - self.last_fps_update_ns < self.fps_update_interval_ns:
+            return
 
-                # Calculate FPS: 1 / average_time_per_frame
-                # This gives us the actual frames per second output
-                with self.fps_lock:
-                    current_fps = self.current_pipeline_fps
-                estimated_fps = (
-                    1.0 / avg_time_per_frame if avg_time_per_frame > 0 else current_fps
-                )
+        # Calculate FPS: 1 / average_time_per_frame
+        # This gives us the actual frames per second output
+        # Clamp to reasonable bounds
+        estimated_fps = max(self.min_fps, min(self.max_fps, 1e9 / ns_per_frame))
+        with self.fps_lock:
+            changed = estimated_fps != self.current_pipeline_fps
+            self.current_pipeline_fps = estimated_fps
 
-                # Clamp to reasonable bounds
-                estimated_fps = max(self.min_fps, min(self.max_fps, estimated_fps))
-                with self.fps_lock:
-                    self.current_pipeline_fps = estimated_fps
+        self.last_fps_update_ns = now_ns
+        if changed and self.fps_callback:
+            self.fps_callback(estimated_fps)
 
-            self.last_fps_update = current_time
+    def update_parameters(self, parameters: dict[str, Any]) -> bool:
+        """
+        Update parameters that will be used in the next pipeline call.
 
-    def update_parameters(self, parameters: dict[str, Any]):
-        """Update parameters that will be used in the next pipeline call."""
+        Returns:
+            bool: True if the update was queued, False if it was dropped
+        """
         # Put new parameters in queue (replace any pending update)
         try:
             # Add new update
@@ -187,6 +292,45 @@ class FrameProcessor:
             logger.info("Parameter queue full, dropping parameter update")
             return False
 
+        self._notify_worker()
+        return True
+
+    def _notify_worker(self):
+        with self._work_available:
+            self._work_available.notify()
+
+    def _wait_for_work(self, frames_needed: int = sys.maxsize):
+        """
+        Block the worker until frames_needed frames are buffered, parameters are
+        updated or the processor stops, with SLEEP_TIME as an upper bound.
+        """
+        with self._work_available:
+            # Checked under the lock, and put() only notifies after publishing the
+            # frame, so a wakeup can't be missed between the check and the wait
+            self._frames_needed = frames_needed
+            if self.running and len(self.frame_buffer) < frames_needed:
+                self._work_available.wait(timeout=SLEEP_TIME)
+            self._frames_needed = sys.maxsize
+
+    def _apply_parameters(self, parameters: dict[str, Any]) -> bool:
+        """
+        Merge a parameter update into self.parameters in place, consuming the
+        paused and reset_cache control flags.
+
+        Returns:
+            bool: True if any regular parameters were updated
+        """
+        parameters = dict(parameters)
+        paused = parameters.pop("paused", None)
+        if paused is not None:
+            self.paused = paused
+        if parameters.pop("reset_cache", None):
+            self._reset_cache_requested = True
+
+        # Merge new parameters with existing ones to preserve any missing keys
+        self.parameters.update(parameters)
+        return bool(parameters)
+
     def worker_loop(self):
         logger.info("Worker thread started")
 
@@ -197,12 +341,11 @@ class FrameProcessor:
             except PipelineNotAvailableException as e:
                 logger.debug(f"Pipeline temporarily unavailable: {e}")
                 # Flush frame buffer to prevent buildup
-                with self.frame_buffer_lock:
-                    if self.frame_buffer:
-                        logger.debug(
-                            f"Flushing {len(self.frame_buffer)} frames due to pipeline unavailability"
-                        )
-                        self.frame_buffer.clear()
+                if not self.frame_buffer.empty():
+                    logger.debug(
+                        f"Flushing {len(self.frame_buffer)} frames due to pipeline unavailability"
+                    )
+                    self.frame_buffer.clear()
                 continue
             except Exception as e:
                 if self._is_recoverable(e):
@@ -217,13 +360,11 @@ class FrameProcessor:
         logger.info("Worker thread stopped")
 
     def process_chunk(self):
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
         try:
             # Check if there are new parameters
             new_parameters = self.parameters_queue.get_nowait()
-            if new_parameters != self.parameters:
-                # Merge new parameters with existing ones to preserve any missing keys
-                self.parameters = {**self.parameters, **new_parameters}
+            if self._apply_parameters(new_parameters):
                 logger.info(f"Updated parameters: {self.parameters}")
         except queue.Empty:
             pass
@@ -232,25 +373,21 @@ class FrameProcessor:
         pipeline = self.pipeline_manager.get_pipeline()
 
         # Pause or resume the processing
-        paused = self.parameters.pop("paused", None)
-        if paused is not None and paused != self.paused:
-            self.paused = paused
         if self.paused:
-            # Sleep briefly to avoid busy waiting
-            self.shutdown_event.wait(SLEEP_TIME)
+            # Drop input while paused so that processing resumes on fresh frames
+            self.frame_buffer.clear()
+            # Wait for a parameter update that resumes processing
+            self._wait_for_work()
             return
 
         # prepare() will handle any required preparation based on parameters internally
-        reset_cache = self.parameters.pop("reset_cache", None)
+        reset_cache = self._reset_cache_requested
+        self._reset_cache_requested = False
 
         # Clear output buffer queue when reset_cache is requested to prevent old frames
         if reset_cache:
             logger.info("Clearing output buffer queue due to reset_cache request")
-            while not self.output_queue.empty():
-                try:
-                    self.output_queue.get_nowait()
-                except queue.Empty:
-                    break
+            self.output_queue.clear()
 
         requirements = pipeline.prepare(
             should_prepare=not self.is_prepared or reset_cache, **self.parameters
@@ -260,12 +397,11 @@ class FrameProcessor:
 
         if requirements is not None:
             current_chunk_size = requirements.input_size
-            with self.frame_buffer_lock:
-                if not self.frame_buffer or len(self.frame_buffer) < current_chunk_size:
-                    # Sleep briefly to avoid busy waiting
-                    self.shutdown_event.wait(SLEEP_TIME)
-                    return
-                input = self.prepare_chunk(current_chunk_size)
+            if len(self.frame_buffer) < current_chunk_size:
+                # Wait until enough frames for the chunk have arrived
+                self._wait_for_work(current_chunk_size)
+                return
+            input = self.prepare_chunk(current_chunk_size)
         try:
             # Pass parameters (excluding prepare-only parameters)
             call_params = {
@@ -273,50 +409,40 @@ class FrameProcessor:
             }
             output = pipeline(input, **call_params)
 
-            processing_time = time.time() - start_time
             num_frames = output.shape[0]
-            logger.debug(
-                f"Processed pipeline in {processing_time:.4f}s, {num_frames} frames"
-            )
+            # Checked first since the f-string would be formatted on every chunk
+            if logger.isEnabledFor(logging.DEBUG):
+                processing_time = (time.monotonic_ns() - start_ns) / 1e9
+                logger.debug(
+                    f"Processed pipeline in {processing_time:.4f}s, {num_frames} frames"
+                )
 
-            # Normalize to [0, 255] and convert to uint8
-            output = (
-                (output * 255.0)
-                .clamp(0, 255)
-                .to(dtype=torch.uint8)
-                .contiguous()
-                .detach()
-                .cpu()
-            )
+            output, copy_event = self._convert_output(output)
 
             # Resize output queue to meet target max size
-            target_output_queue_max_size = num_frames * OUTPUT_QUEUE_MAX_SIZE_FACTOR
+            # The slots are preallocated so this is just a bound change, no copy
+            target_output_queue_max_size = min(
+                num_frames * OUTPUT_QUEUE_MAX_SIZE_FACTOR, self.output_queue.capacity
+            )
             if self.output_queue.maxsize < target_output_queue_max_size:
                 logger.info(
                     f"Increasing output queue size to {target_output_queue_max_size}, current size {self.output_queue.maxsize}, num_frames {num_frames}"
                 )
-
-                # Transfer frames from old queue to new queue
-                old_queue = self.output_queue
-                self.output_queue = queue.Queue(maxsize=target_output_queue_max_size)
-                while not old_queue.empty():
-                    try:
-                        frame = old_queue.get_nowait()
-                        self.output_queue.put_nowait(frame)
-                    except queue.Empty:
-                        break
-
-            for frame in output:
-                try:
-                    self.output_queue.put_nowait(frame)
-                except queue.Full:
-                    logger.warning("Output queue full, dropping processed frame")
-                    # Update FPS calculation based on processing time and frame count
-                    self._calculate_pipeline_fps(start_time, num_frames)
-                    continue
+                self.output_queue.resize(target_output_queue_max_size)
+
+            # Set before queueing so frames of this chunk are never counted as stale
+            self._output_chunk_size = num_frames
+            # Frames are queued with the event of their pending copy
+            frames = [(frame, copy_event) for frame in output.unbind(0)]
+            queued = self.output_queue.put_many(frames)
+            dropped = num_frames - queued
+            if dropped:
+                logger.warning(f"Output queue full, dropped {dropped} processed frames")
+            if queued and self.output_ready_callback:
+                self.output_ready_callback()
 
             # Update FPS calculation based on processing time and frame count
-            self._calculate_pipeline_fps(start_time, num_frames)
+            self._calculate_pipeline_fps(start_ns, num_frames)
         except Exception as e:
             if self._is_recoverable(e):
                 # Handle recoverable errors with full stack trace and continue processing
@@ -324,6 +450,142 @@ class FrameProcessor:
             else:
                 raise e
 
+    def _convert_output(
+        self, output: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.cuda.Event | None]:
+        """
+        Convert a THWC output in [0, 1] into a contiguous uint8 CPU tensor.
+
+        The result is THWC RGB, or T x (H * 3 / 2) x W yuv420p planes when the
+        yuv420p output format applies, see get().
+
+        Returns:
+            The CPU tensor and, for CUDA outputs, an event that completes once the
+            asynchronous copy into it has finished
+        """
+        if (
+            self._output_input is None
+            or self._output_input.shape != output.shape
+            or self._output_input.device != output.device
+        ):
+            # New shape (first chunk, pipeline switch etc.) so run eagerly for now
+            self._output_graph = None
+            self._output_graph_failed = False
+            self._output_input = torch.empty(
+                output.shape, dtype=torch.float32, device=output.device
+            )
+            self._output_scratch = torch.empty_like(self._output_input)
+
+            num_frames, height, width, _ = output.shape
+            # Converting to yuv420p on the GPU spares the encoder a swscale pass per
+            # frame, chroma subsampling needs even dimensions
+            if (
+                self.output_format == "yuv420p"
+                and output.is_cuda
+                and height % 2 == 0
+                and width % 2 == 0
+            ):
+                self._yuv_matrix = torch.tensor(
+                    YUV_FROM_RGB, dtype=torch.float32, device=output.device
+                )
+                u8_shape = (num_frames, height * 3 // 2, width)
+            else:
+                self._yuv_matrix = None
+                u8_shape = output.shape
+            self._output_u8 = torch.empty(
+                u8_shape, dtype=torch.uint8, device=output.device
+            )
+        elif (
+            self._output_graph is None
+            and not self._output_graph_failed
+            and output.is_cuda
+        ):
+            # The shape repeated so it is the steady state shape, capture it
+            self._output_graph = self._capture_output_graph()
+            self._output_graph_failed = self._output_graph is None
+
+        if output.is_cuda and self._copy_event is not None:
+            # Don't overwrite the uint8 buffer before the previous copy has read it
+            torch.cuda.current_stream().wait_event(self._copy_event)
+
+        self._output_input.copy_(output.detach())
+        if self._output_graph is not None:
+            self._output_graph.replay()
+        else:
+            self._run_output_conversion()
+
+        if not output.is_cuda:
+            return self._output_u8.clone(), None
+
+        if self._copy_stream is None:
+            self._copy_stream = torch.cuda.Stream()
+        self._copy_stream.wait_stream(torch.cuda.current_stream())
+
+        # Frames from this chunk stay in the output queue after the next chunk is
+        # produced, so the host buffer can't simply be overwritten. Pinned memory
+        # comes from the caching host allocator instead, which reuses a block once
+        # every frame viewing it has been released
+        output_cpu = torch.empty(
+            self._output_u8.shape, dtype=torch.uint8, pin_memory=True
+        )
+        with torch.cuda.stream(self._copy_stream):
+            output_cpu.copy_(self._output_u8, non_blocking=True)
+        self._copy_event = torch.cuda.Event()
+        self._copy_event.record(self._copy_stream)
+        return output_cpu, self._copy_event
+
+    def _run_output_conversion(self):
+        """Normalize to [0, 255] and convert to uint8 in the reused device buffers."""
+        torch.mul(self._output_input, 255.0, out=self._output_scratch)
+        self._output_scratch.clamp_(0, 255)
+        if self._yuv_matrix is None:
+            self._output_u8.copy_(self._output_scratch)
+            return
+
+        rgb = self._output_scratch
+        num_frames, height, width, _ = rgb.shape
+        planes = self._output_u8.view(num_frames, -1)
+        luma_size = height * width
+
+        luma = rgb @ self._yuv_matrix[0] + LUMA_OFFSET
+        planes[:, :luma_size].copy_(luma.view(num_frames, luma_size))
+
+        # Chroma is linear in RGB so averaging each 2x2 block first is equivalent
+        # to averaging the per pixel chroma, and a quarter of the work
+        rgb_blocks = rgb.view(num_frames, height // 2, 2, width // 2, 2, 3)
+        chroma = rgb_blocks.mean(dim=(2, 4)) @ self._yuv_matrix[1:].T + CHROMA_OFFSET
+        # Lay out the whole U plane followed by the whole V plane
+        chroma = chroma.permute(0, 3, 1, 2).reshape(num_frames, -1)
+        planes[:, luma_size:].copy_(chroma)
+
+    def _capture_output_graph(self) -> torch.cuda.CUDAGraph | None:
+        """
+        Capture the output conversion so each chunk launches it with one replay.
+
+        Returns None if capturing fails, in which case the conversion runs eagerly.
+        """
+        # Warm up on a side stream before capturing as required by CUDA graphs
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            self._run_output_conversion()
+        torch.cuda.current_stream().wait_stream(stream)
+
+        graph = torch.cuda.CUDAGraph()
+        try:
+            # Other threads (other sessions, pre-warming, the track's copy waits)
+            # keep using CUDA while this captures, thread_local mode only rejects
+            # unsafe calls made from this thread
+            with torch.cuda.graph(graph, capture_error_mode="thread_local"):
+                self._run_output_conversion()
+        except Exception as e:
+            logger.warning(
+                f"Capturing output conversion graph failed, running eagerly: {e}"
+            )
+            return None
+        logger.debug(f"Captured output conversion graph for {self._output_u8.shape}")
+        return graph
+
     def prepare_chunk(self, chunk_size: int) -> list[torch.Tensor]:
         """
         Sample frames uniformly from the buffer, convert them to tensors, and remove processed frames.
@@ -334,8 +596,8 @@ class FrameProcessor:
         buffer buildup.
 
         Note:
-            This function must be called with self.frame_buffer_lock held to ensure
-            thread safety. The caller is responsible for acquiring the lock.
+            This function must only be called from the worker thread, which is the
+            sole consumer of self.frame_buffer.
 
         Example:
             With buffer_len=8 and chunk_size=4:
@@ -345,32 +607,69 @@ class FrameProcessor:
             - Removes frames 0-6 from buffer (7 frames total)
 
         Returns:
-            List of processed tensor frames, or empty list if insufficient buffer
+            List of 1HWC uint8 tensor frames that are views of one batched chunk,
+            on the GPU when available, only valid until the next call
         """
-        # Calculate uniform sampling step
-        step = len(self.frame_buffer) / chunk_size
-        # Generate indices for uniform sampling
-        indices = [round(i * step) for i in range(chunk_size)]
+        # Generate indices for uniform sampling with a step of buffer_len/chunk_size
+        indices = (
+            np.linspace(0, len(self.frame_buffer), chunk_size, endpoint=False)
+            .round()
+            .astype(np.intp)
+        )
         # Extract VideoFrames at sampled indices
-        video_frames = [self.frame_buffer[i] for i in indices]
+        video_frames = self.frame_buffer.gather(indices)
 
         # Drop all frames up to and including the last sampled frame
-        last_idx = indices[-1]
-        for _ in range(last_idx + 1):
-            self.frame_buffer.popleft()
-
-        # Convert VideoFrames to tensors
-        tensor_frames = []
-        for video_frame in video_frames:
-            # Convert VideoFrame into THWC tensor on cpu
-            tensor = (
-                torch.from_numpy(video_frame.to_ndarray(format="rgb24"))
-                .float()
-                .unsqueeze(0)
+        last_idx = int(indices[-1])
+        self.frame_buffer.skip(last_idx + 1)
+
+        # Copy the frames into the staging buffer, reformatting them to the size of
+        # the first frame since the stream resolution can change mid-chunk
+        height, width = video_frames[0].height, video_frames[0].width
+        chunk_buffer = self._get_chunk_buffer(chunk_size, height, width)
+        if self._upload_event is not None:
+            # The previous upload must have read the staging buffer before reuse
+            self._upload_event.synchronize()
+        for i, video_frame in enumerate(video_frames):
+            rgb_frame = self._reformatter.reformat(
+                video_frame, format="rgb24", width=width, height=height
             )
-            tensor_frames.append(tensor)
+            np.copyto(chunk_buffer[i].numpy(), self._rgb_frame_view(rgb_frame))
+
+        if not torch.cuda.is_available():
+            return list(chunk_buffer.split(1))
 
-        return tensor_frames
+        # Upload the whole chunk with a single async DMA
+        if self._gpu_chunk is None or self._gpu_chunk.shape != chunk_buffer.shape:
+            self._gpu_chunk = torch.empty_like(chunk_buffer, device="cuda")
+        self._gpu_chunk.copy_(chunk_buffer, non_blocking=True)
+        if self._upload_event is None:
+            self._upload_event = torch.cuda.Event()
+        self._upload_event.record()
+
+        return list(self._gpu_chunk.split(1))
+
+    @staticmethod
+    def _rgb_frame_view(frame: VideoFrame) -> np.ndarray:
+        """Get a zero-copy HWC view of an rgb24 VideoFrame's pixels."""
+        plane = frame.planes[0]
+        # Rows may be padded so slice off anything past the last pixel
+        rows = np.frombuffer(plane, dtype=np.uint8).reshape(
+            frame.height, plane.line_size
+        )
+        return rows[:, : frame.width * 3].reshape(frame.height, frame.width, 3)
+
+    def _get_chunk_buffer(
+        self, chunk_size: int, height: int, width: int
+    ) -> torch.Tensor:
+        """Get the input staging buffer, reallocating it only when the shape changes."""
+        shape = (chunk_size, height, width, 3)
+        if self._chunk_buffer is None or self._chunk_buffer.shape != shape:
+            # Pinned memory allows the pipeline to upload the chunk with async DMA
+            self._chunk_buffer = torch.empty(
+                shape, dtype=torch.uint8, pin_memory=torch.cuda.is_available()
+            )
+        return self._chunk_buffer
 
     def __enter__(self):
         self.start()
@@ -6,6 +6,7 @@ Provides centralized configuration for model storage location with support for:
 - Environment variable override: DAYDREAM_MODELS_DIR
 """
 
+import functools
 import logging
 import os
 from pathlib import Path
@@ -19,6 +20,7 @@ DEFAULT_MODELS_DIR = "~/.daydream-scope/models"
 MODELS_DIR_ENV_VAR = "DAYDREAM_SCOPE_MODELS_DIR"
 
 
+@functools.lru_cache(maxsize=1)
 def get_models_dir() -> Path:
     """
     Get the models directory path.
@@ -27,6 +29,9 @@ def get_models_dir() -> Path:
     1. DAYDREAM_SCOPE_MODELS_DIR environment variable
     2. Default: ~/.daydream-scope/models
 
+    The result is cached, call clear_models_dir_cache() after changing the
+    environment variable.
+
     Returns:
         Path: Absolute path to the models directory
     """
@@ -43,6 +48,12 @@ def get_models_dir() -> Path:
     return models_dir
 
 
+def clear_models_dir_cache():
+    """Forget the cached models directory and the paths derived from it."""
+    get_models_dir.cache_clear()
+    get_required_model_files.cache_clear()
+
+
 def ensure_models_dir() -> Path:
     """
     Get the models directory path and ensure it exists.
@@ -69,20 +80,21 @@ def get_model_file_path(relative_path: str) -> Path:
     return models_dir / relative_path
 
 
-def get_required_model_files() -> list[Path]:
+@functools.lru_cache(maxsize=1)
+def get_required_model_files() -> tuple[Path, ...]:
     """
-    Get the list of required model files that should exist.
+    Get the required model files that should exist.
 
     Returns:
-        list[Path]: List of required model file paths
+        tuple[Path, ...]: Required model file paths
     """
     models_dir = get_models_dir()
-    return [
+    return (
         models_dir / "Wan2.1-T2V-1.3B" / "config.json",
         models_dir / "WanVideo_comfy" / "umt5-xxl-enc-fp8_e4m3fn.safetensors",
         models_dir / "LongLive-1.3B" / "models" / "longlive_base.pt",
         models_dir / "StreamDiffusionV2" / "model.pt",
-    ]
+    )
 
 
 def models_are_downloaded() -> bool:
@@ -1,10 +1,14 @@
 """Pipeline Manager for lazy loading and managing ML pipelines."""
 
 import asyncio
+import copy
+import functools
 import gc
 import logging
 import os
 import threading
+from collections.abc import Callable
+from concurrent.futures import Executor
 from enum import Enum
 from typing import Any
 
@@ -14,6 +18,152 @@ from omegaconf import OmegaConf
 logger = logging.getLogger(__name__)
 
 
+TEXT_ENCODER_FILE = "WanVideo_comfy/umt5-xxl-enc-fp8_e4m3fn.safetensors"
+# Set to 0 to keep cuDNN's default algorithm selection, e.g. for runs that need
+# deterministic output
+CUDNN_BENCHMARK_ENV_VAR = "SCOPE_CUDNN_BENCHMARK"
+# Pipeline ID -> (height, width) used when the load parameters don't set them
+PIPELINE_DEFAULT_RESOLUTION: dict[str, tuple[int, int]] = {
+    "streamdiffusionv2": (512, 512),
+    "passthrough": (512, 512),
+    "vod": (512, 512),
+    "longlive": (320, 576),
+    "mycustom": (320, 576),
+}
+
+
+@functools.cache
+def _load_config_cached(path: str):
+    return OmegaConf.load(path)
+
+
+def load_config(path: str):
+    """Load a pipeline YAML config, parsing each file only once per process."""
+    # Pipelines get a copy since the config is mutated with load parameters
+    return copy.deepcopy(_load_config_cached(path))
+
+
+def extract_hw_seed(
+    load_params: dict | None, height: int, width: int, seed: int = 42
+) -> tuple[int, int, int]:
+    """Get the height, width and seed from load parameters with fallback defaults."""
+    if load_params:
+        height = load_params.get("height", height)
+        width = load_params.get("width", width)
+        seed = load_params.get("seed", seed)
+    return height, width, seed
+
+
+def _load_streamdiffusionv2(load_params: dict | None):
+    from lib.models_config import get_model_file_path, get_models_dir
+    from pipelines.streamdiffusionv2.pipeline import StreamDiffusionV2Pipeline
+
+    config = load_config("pipelines/streamdiffusionv2/model.yaml")
+    config["model_dir"] = str(get_models_dir())
+    config["text_encoder_path"] = str(get_model_file_path(TEXT_ENCODER_FILE))
+
+    # Use load parameters for resolution and seed
+    config["height"], config["width"], config["seed"] = extract_hw_seed(
+        load_params, *PIPELINE_DEFAULT_RESOLUTION["streamdiffusionv2"]
+    )
+
+    pipeline = StreamDiffusionV2Pipeline(
+        config, device=torch.device("cuda"), dtype=torch.bfloat16
+    )
+    logger.info("StreamDiffusionV2 pipeline initialized")
+    return pipeline
+
+
+def _load_passthrough(load_params: dict | None):
+    from pipelines.passthrough.pipeline import PassthroughPipeline
+
+    # Use load parameters for resolution, default to 512x512
+    height, width, _ = extract_hw_seed(
+        load_params, *PIPELINE_DEFAULT_RESOLUTION["passthrough"]
+    )
+
+    pipeline = PassthroughPipeline(
+        height=height,
+        width=width,
+        device=torch.device("cuda"),
+        dtype=torch.bfloat16,
+    )
+    logger.info("Passthrough pipeline initialized")
+    return pipeline
+
+
+def _load_vod(load_params: dict | None):
+    from pipelines.vod.pipeline import VodPipeline
+
+    # Use load parameters for resolution, default to 512x512
+    height, width, _ = extract_hw_seed(load_params, *PIPELINE_DEFAULT_RESOLUTION["vod"])
+
+    pipeline = VodPipeline(
+        height=height,
+        width=width,
+        device=torch.device("cuda"),
+        dtype=torch.bfloat16,
+    )
+    logger.info("VOD pipeline initialized")
+    return pipeline
+
+
+def _load_longlive_config(pipeline_id: str, path: str, load_params: dict | None):
+    """Load a config for a pipeline built on the LongLive-1.3B weights."""
+    from lib.models_config import get_model_file_path, get_models_dir
+
+    config = load_config(path)
+    config["model_dir"] = str(get_models_dir())
+    config["generator_path"] = get_model_file_path(
+        "LongLive-1.3B/models/longlive_base.pt"
+    )
+    config["lora_path"] = get_model_file_path("LongLive-1.3B/models/lora.pt")
+    config["text_encoder_path"] = str(get_model_file_path(TEXT_ENCODER_FILE))
+
+    config["height"], config["width"], config["seed"] = extract_hw_seed(
+        load_params, *PIPELINE_DEFAULT_RESOLUTION[pipeline_id]
+    )
+    return config
+
+
+def _load_longlive(load_params: dict | None):
+    from pipelines.longlive.pipeline import LongLivePipeline
+
+    config = _load_longlive_config(
+        "longlive", "pipelines/longlive/model.yaml", load_params
+    )
+    pipeline = LongLivePipeline(
+        config, device=torch.device("cuda"), dtype=torch.bfloat16
+    )
+    logger.info("LongLive pipeline initialized")
+    return pipeline
+
+
+def _load_mycustom(load_params: dict | None):
+    from pipelines.mycustom.pipeline import MyCustomPipeline
+
+    config = _load_longlive_config(
+        "mycustom", "pipelines/mycustom/model.yaml", load_params
+    )
+    pipeline = MyCustomPipeline(
+        config, device=torch.device("cuda"), dtype=torch.bfloat16
+    )
+    logger.info("MyCustom pipeline initialized")
+    return pipeline
+
+
+# Pipeline ID -> factory taking the load parameters
+# Pipeline modules are imported inside the factories so that only the selected
+# pipeline's dependencies are loaded
+PIPELINE_REGISTRY: dict[str, Callable[[dict | None], Any]] = {
+    "streamdiffusionv2": _load_streamdiffusionv2,
+    "passthrough": _load_passthrough,
+    "vod": _load_vod,
+    "longlive": _load_longlive,
+    "mycustom": _load_mycustom,
+}
+
+
 class PipelineNotAvailableException(Exception):
     """Exception raised when pipeline is not available for processing."""
 
@@ -38,7 +188,21 @@ class PipelineManager:
         self._pipeline_id = None
         self._load_params = None
         self._error_message = None
-        self._lock = threading.RLock()  # Single reentrant lock for all access
+        # Single lock for all state changes, nothing reacquires it while held
+        self._lock = threading.Lock()
+
+        # Expandable segments let the CUDA caching allocator grow segments in place
+        # rather than fragmenting memory as pipelines are loaded and unloaded
+        # Leave any configuration provided by the user untouched
+        if torch.cuda.is_available() and "PYTORCH_CUDA_ALLOC_CONF" not in os.environ:
+            torch.cuda.memory._set_allocator_settings("expandable_segments:True")
+
+        # Pipelines run fixed input shapes, so let cuDNN benchmark and cache the
+        # fastest algorithms for them. This is process wide and makes algorithm
+        # choice, and so the exact output, vary between runs
+        torch.backends.cudnn.benchmark = (
+            os.environ.get(CUDNN_BENCHMARK_ENV_VAR, "1") != "0"
+        )
 
     @property
     def status(self) -> PipelineStatus:
@@ -56,23 +220,45 @@ class PipelineManager:
         return self._error_message
 
     def get_pipeline(self):
-        """Get the loaded pipeline instance (thread-safe)."""
-        with self._lock:
-            if self._status != PipelineStatus.LOADED or self._pipeline is None:
-                raise PipelineNotAvailableException(
-                    f"Pipeline not available. Status: {self._status.value}"
-                )
-            return self._pipeline
+        """
+        Get the loaded pipeline instance (thread-safe).
+
+        This is called for every processed chunk so it doesn't take the lock.
+        Single attribute reads are atomic under the GIL, and loading assigns the
+        pipeline before marking it LOADED while unloading clears the status before
+        the pipeline. The pipeline is read again after the status, so an unload and
+        load of another pipeline in between is treated as not available rather than
+        pairing the old instance with the new LOADED status.
+        """
+        pipeline = self._pipeline
+        status = self._status
+        if (
+            status != PipelineStatus.LOADED
+            or pipeline is None
+            or pipeline is not self._pipeline
+        ):
+            raise PipelineNotAvailableException(
+                f"Pipeline not available. Status: {status.value}"
+            )
+        return pipeline
 
     def get_status_info(self) -> dict[str, Any]:
-        """Get detailed status information (thread-safe)."""
-        with self._lock:
-            return {
-                "status": self._status.value,
-                "pipeline_id": self._pipeline_id,
-                "load_params": self._load_params,
-                "error": self._error_message,
-            }
+        """
+        Get detailed status information (thread-safe).
+
+        Doesn't take the lock, which a load holds until it finishes, so status polls
+        from the event loop never wait on a load. The status is read first and
+        loads assign the other fields before the status that goes with them, so in
+        practice the details match the status, though an unload racing with the
+        read can clear them.
+        """
+        status = self._status
+        return {
+            "status": status.value,
+            "pipeline_id": self._pipeline_id,
+            "load_params": self._load_params,
+            "error": self._error_message,
+        }
 
     async def get_pipeline_async(self):
         """Get the loaded pipeline instance (async wrapper)."""
@@ -85,7 +271,10 @@ class PipelineManager:
         return await loop.run_in_executor(None, self.get_status_info)
 
     async def load_pipeline(
-        self, pipeline_id: str | None = None, load_params: dict | None = None
+        self,
+        pipeline_id: str | None = None,
+        load_params: dict | None = None,
+        executor: Executor | None = None,
     ) -> bool:
         """
         Load a pipeline asynchronously.
@@ -93,13 +282,14 @@ class PipelineManager:
         Args:
             pipeline_id: ID of pipeline to load. If None, uses PIPELINE env var.
             load_params: Pipeline-specific load parameters.
+            executor: Executor to run the load on. If None, uses the loop's default.
 
         Returns:
             bool: True if loaded successfully, False otherwise.
         """
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
-            None, self._load_pipeline_sync_wrapper, pipeline_id, load_params
+            executor, self._load_pipeline_sync_wrapper, pipeline_id, load_params
         )
 
     def _load_pipeline_sync_wrapper(
@@ -145,6 +335,7 @@ class PipelineManager:
 
                 # Load the pipeline synchronously (we're already in executor thread)
                 pipeline = self._load_pipeline_implementation(pipeline_id, load_params)
+                self._warmup_pipeline(pipeline_id, pipeline, load_params)
 
                 self._pipeline = pipeline
                 self._pipeline_id = pipeline_id
@@ -158,11 +349,12 @@ class PipelineManager:
                 error_msg = f"Failed to load pipeline {pipeline_id}: {str(e)}"
                 logger.error(error_msg)
 
-                self._status = PipelineStatus.ERROR
                 self._error_message = error_msg
                 self._pipeline = None
                 self._pipeline_id = None
                 self._load_params = None
+                # Set last so lock-free readers see the details with the status
+                self._status = PipelineStatus.ERROR
 
                 return False
 
@@ -183,157 +375,40 @@ class PipelineManager:
         if torch.cuda.is_available():
             try:
                 torch.cuda.empty_cache()
-                torch.cuda.synchronize()
                 logger.info("CUDA cache cleared")
             except Exception as e:
                 logger.warning(f"CUDA cleanup failed: {e}")
 
-    def _load_pipeline_implementation(
-        self, pipeline_id: str, load_params: dict | None = None
+    def _warmup_pipeline(
+        self, pipeline_id: str, pipeline, load_params: dict | None = None
     ):
-        """Synchronous pipeline loading (runs in thread executor)."""
-        if pipeline_id == "streamdiffusionv2":
-            from lib.models_config import get_model_file_path, get_models_dir
-            from pipelines.streamdiffusionv2.pipeline import StreamDiffusionV2Pipeline
-
-            config = OmegaConf.load("pipelines/streamdiffusionv2/model.yaml")
-            models_dir = get_models_dir()
-            config["model_dir"] = str(models_dir)
-            config["text_encoder_path"] = str(
-                get_model_file_path(
-                    "WanVideo_comfy/umt5-xxl-enc-fp8_e4m3fn.safetensors"
-                )
-            )
-
-            # Use load parameters for resolution and seed
-            height = 512
-            width = 512
-            seed = 42
-            if load_params:
-                height = load_params.get("height", 512)
-                width = load_params.get("width", 512)
-                seed = load_params.get("seed", 42)
-
-            config["height"] = height
-            config["width"] = width
-            config["seed"] = seed
-
-            pipeline = StreamDiffusionV2Pipeline(
-                config, device=torch.device("cuda"), dtype=torch.bfloat16
-            )
-            logger.info("StreamDiffusionV2 pipeline initialized")
-            return pipeline
-
-        elif pipeline_id == "passthrough":
-            from pipelines.passthrough.pipeline import PassthroughPipeline
-
-            # Use load parameters for resolution, default to 512x512
-            height = 512
-            width = 512
-            if load_params:
-                height = load_params.get("height", 512)
-                width = load_params.get("width", 512)
-
-            pipeline = PassthroughPipeline(
-                height=height,
-                width=width,
-                device=torch.device("cuda"),
-                dtype=torch.bfloat16,
-            )
-            logger.info("Passthrough pipeline initialized")
-            return pipeline
-
-        elif pipeline_id == "vod":
-            from pipelines.vod.pipeline import VodPipeline
-
-            # Use load parameters for resolution, default to 512x512
-            height = 512
-            width = 512
-            if load_params:
-                height = load_params.get("height", 512)
-                width = load_params.get("width", 512)
-
-            pipeline = VodPipeline(
-                height=height,
-                width=width,
-                device=torch.device("cuda"),
-                dtype=torch.bfloat16,
-            )
-            logger.info("VOD pipeline initialized")
-            return pipeline
-
-        elif pipeline_id == "longlive":
-            from lib.models_config import get_model_file_path, get_models_dir
-            from pipelines.longlive.pipeline import LongLivePipeline
-
-            config = OmegaConf.load("pipelines/longlive/model.yaml")
-            models_dir = get_models_dir()
-            config["model_dir"] = str(models_dir)
-            config["generator_path"] = get_model_file_path(
-                "LongLive-1.3B/models/longlive_base.pt"
-            )
-            config["lora_path"] = get_model_file_path("LongLive-1.3B/models/lora.pt")
-            config["text_encoder_path"] = str(
-                get_model_file_path(
-                    "WanVideo_comfy/umt5-xxl-enc-fp8_e4m3fn.safetensors"
-                )
-            )
-
-            height = 320
-            width = 576
-            seed = 42
-            if load_params:
-                height = load_params.get("height", 320)
-                width = load_params.get("width", 576)
-                seed = load_params.get("seed", 42)
-
-            config["height"] = height
-            config["width"] = width
-            config["seed"] = seed
-
-            pipeline = LongLivePipeline(
-                config, device=torch.device("cuda"), dtype=torch.bfloat16
-            )
-            logger.info("LongLive pipeline initialized")
-            return pipeline
-
-        elif pipeline_id == "mycustom":
-            from lib.models_config import get_model_file_path, get_models_dir
-            from pipelines.mycustom.pipeline import MyCustomPipeline
-
-            config = OmegaConf.load("pipelines/mycustom/model.yaml")
-            models_dir = get_models_dir()
-            config["model_dir"] = str(models_dir)
-            config["generator_path"] = get_model_file_path(
-                "LongLive-1.3B/models/longlive_base.pt"
-            )
-            config["lora_path"] = get_model_file_path("LongLive-1.3B/models/lora.pt")
-            config["text_encoder_path"] = str(
-                get_model_file_path(
-                    "WanVideo_comfy/umt5-xxl-enc-fp8_e4m3fn.safetensors"
-                )
-            )
-
-            height = 320
-            width = 576
-            seed = 42
-            if load_params:
-                height = load_params.get("height", 320)
-                width = load_params.get("width", 576)
-                seed = load_params.get("seed", 42)
-
-            config["height"] = height
-            config["width"] = width
-            config["seed"] = seed
+        """Warm up a freshly loaded pipeline so the first chunk runs at full speed."""
+        height, width, _ = extract_hw_seed(
+            load_params, *PIPELINE_DEFAULT_RESOLUTION[pipeline_id]
+        )
 
-            pipeline = MyCustomPipeline(
-                config, device=torch.device("cuda"), dtype=torch.bfloat16
+        try:
+            start = torch.cuda.Event(enable_timing=True)
+            end = torch.cuda.Event(enable_timing=True)
+            start.record()
+            pipeline.warmup(height, width)
+            end.record()
+            end.synchronize()
+            logger.info(
+                f"Pipeline {pipeline_id} warmed up in {start.elapsed_time(end) / 1000:.3f}s"
             )
-            logger.info("MyCustom pipeline initialized")
-            return pipeline
+        except Exception as e:
+            # A failed warmup only costs first chunk latency, don't fail the load
+            logger.warning(f"Failed to warm up pipeline {pipeline_id}: {e}")
 
-        else:
+    def _load_pipeline_implementation(
+        self, pipeline_id: str, load_params: dict | None = None
+    ):
+        """Synchronous pipeline loading (runs in thread executor)."""
+        factory = PIPELINE_REGISTRY.get(pipeline_id)
+        if factory is None:
             raise ValueError(f"Invalid pipeline ID: {pipeline_id}")
+        return factory(load_params)
 
     def unload_pipeline(self):
         """Unload the current pipeline (thread-safe)."""
@@ -341,6 +416,5 @@ class PipelineManager:
             self._unload_pipeline_unsafe()
 
     def is_loaded(self) -> bool:
-        """Check if pipeline is loaded and ready (thread-safe)."""
-        with self._lock:
-            return self._status == PipelineStatus.LOADED
+        """Check if pipeline is loaded and ready (thread-safe, doesn't take the lock)."""
+        return self._status == PipelineStatus.LOADED
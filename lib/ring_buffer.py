@@ -0,0 +1,157 @@
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+
+class SPSCRing:
+    """
+    Bounded FIFO for exactly one producer thread and one consumer thread.
+
+    No lock is taken on put or get. The producer only ever stores tail and the
+    consumer only ever stores head, and under the GIL a single attribute or list
+    slot store is atomic. The producer writes the slot before publishing the new
+    tail, so the consumer never observes an unwritten slot.
+
+    The slots live in a numpy object array so the consumer can fetch many items with
+    a single vectorized gather.
+
+    head and tail count items ever read/written and are never wrapped, so the size
+    is simply tail - head. The backing list has a power of two capacity so a slot
+    index is found with a mask instead of a modulo.
+
+    The backing list is allocated once. maxsize can later be raised with resize()
+    up to the capacity without copying, so pass a larger capacity up front if the
+    ring is expected to grow.
+
+    With overwrite=True the producer never fails: putting into a full ring drops the
+    oldest item instead of the new one, and the consumer only ever sees the newest
+    maxsize items. The consumer may then occasionally read an item newer than the
+    one it expected at a position, so this mode is meant for streams where only
+    freshness matters. The capacity is at least twice maxsize so the producer has
+    to lap the consumer by a whole maxsize before a slot it is reading is reused.
+    Dropped items stay referenced until their slot is written again.
+
+    Items must not be None since None is returned to signal an empty ring.
+    """
+
+    def __init__(
+        self, maxsize: int, capacity: int | None = None, overwrite: bool = False
+    ):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        min_capacity = 2 * maxsize if overwrite else maxsize
+        capacity = 1 << (max(min_capacity, capacity or 0) - 1).bit_length()
+        self._buffer = np.full(capacity, None, dtype=object)
+        self._mask = capacity - 1
+        self.maxsize = maxsize
+        self.overwrite = overwrite
+
+        # Next position to read, only stored by the consumer
+        self._head = 0
+        # Next position to write, only stored by the producer
+        self._tail = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._mask + 1
+
+    def _oldest(self) -> int:
+        """Position of the oldest item still in the ring."""
+        if self.overwrite:
+            # Items the producer has overwritten count as dropped
+            return max(self._head, self._tail - self.maxsize)
+        return self._head
+
+    def __len__(self) -> int:
+        return self._tail - self._oldest()
+
+    def empty(self) -> bool:
+        return self._tail == self._head
+
+    def full(self) -> bool:
+        return len(self) >= self.maxsize
+
+    def resize(self, maxsize: int):
+        """Change maxsize in place. Safe from either side since nothing is copied."""
+        max_maxsize = self.capacity // 2 if self.overwrite else self.capacity
+        if not 1 <= maxsize <= max_maxsize:
+            raise ValueError(
+                f"maxsize must be between 1 and {max_maxsize}, got {maxsize}"
+            )
+        self.maxsize = maxsize
+
+    def try_put(self, item: Any) -> bool:
+        """
+        Append an item. Producer only.
+
+        Returns False if the ring is full, unless overwrite is set in which case the
+        oldest item is dropped instead.
+        """
+        tail = self._tail
+        if not self.overwrite and tail - self._head >= self.maxsize:
+            return False
+
+        self._buffer[tail & self._mask] = item
+        # Publish the item only after the slot has been written
+        self._tail = tail + 1
+        return True
+
+    def put_many(self, items: Sequence[Any]) -> int:
+        """
+        Append as many items as fit and publish them together. Producer only.
+
+        With overwrite set the newest maxsize items are always appended.
+
+        Returns:
+            int: Number of items appended, the rest were dropped
+        """
+        tail = self._tail
+        if self.overwrite:
+            count = min(len(items), self.maxsize)
+            items = items[len(items) - count :]
+        else:
+            count = max(0, min(len(items), self.maxsize - (tail - self._head)))
+        # Slots are written one by one since numpy would try to convert a sequence
+        # of array-likes (e.g. tensors) assigned through a fancy index
+        for offset in range(count):
+            self._buffer[(tail + offset) & self._mask] = items[offset]
+        # Publish all items only after their slots have been written
+        self._tail = tail + count
+        return count
+
+    def try_get(self) -> Any | None:
+        """Pop the oldest item. Consumer only. Returns None if the ring is empty."""
+        head = self._oldest()
+        if head == self._tail:
+            return None
+
+        index = head & self._mask
+        item = self._buffer[index]
+        # Drop the reference so the item can be freed once the caller is done
+        self._buffer[index] = None
+        self._head = head + 1
+        return item
+
+    def gather(self, indices: np.ndarray) -> np.ndarray:
+        """Get the items at positions counted from the oldest. Consumer only."""
+        if len(indices) and not 0 <= indices.min() <= indices.max() < len(self):
+            raise IndexError("ring indices out of range")
+        return self._buffer[(self._oldest() + indices) & self._mask]
+
+    def skip(self, count: int):
+        """Drop the oldest count items. Consumer only."""
+        head = self._oldest()
+        count = min(count, self._tail - head)
+        self._buffer[np.arange(head, head + count) & self._mask] = None
+        self._head = head + count
+
+    def clear(self):
+        """
+        Drop all items currently in the ring.
+
+        Meant for the consumer, but safe to call from the producer too, in which
+        case a concurrent try_get may return None.
+        """
+        self.skip(len(self))
@@ -1,9 +1,10 @@
 import asyncio
 import fractions
 import logging
-import threading
-import time
+import os
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 from aiortc import MediaStreamTrack
 from aiortc.mediastreams import VIDEO_CLOCK_RATE, VIDEO_TIME_BASE, MediaStreamError
 from av import VideoFrame
@@ -13,6 +14,37 @@ from .pipeline_manager import PipelineManager
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on how long recv() waits for the processor to signal new output
+OUTPUT_WAIT_TIMEOUT = 0.1
+# Comma separated CPU ids to pin the frame convert threads to, e.g. "3" or "2,3"
+CONVERT_CPUS_ENV_VAR = "SCOPE_CONVERT_CPUS"
+# Set to 0 to send frames as soon as they are ready instead of pacing them to the
+# pipeline FPS, for clients that do their own jitter buffering
+PACE_OUTPUT_ENV_VAR = "SCOPE_PACE_OUTPUT"
+
+
+def get_convert_cpus() -> set[int] | None:
+    """Get the CPUs the frame convert threads should be pinned to, if configured."""
+    value = os.environ.get(CONVERT_CPUS_ENV_VAR, "").strip()
+    if not value:
+        return None
+    try:
+        return {int(cpu) for cpu in value.split(",")}
+    except ValueError:
+        logger.warning(f"Ignoring invalid {CONVERT_CPUS_ENV_VAR}={value!r}")
+        return None
+
+
+def _pin_current_thread(cpus: set[int] | None):
+    """Executor initializer keeping the convert thread and its buffers on given CPUs."""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        # On Linux pid 0 refers to the calling thread
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        logger.warning(f"Failed to pin frame convert thread to CPUs {cpus}: {e}")
+
 
 class VideoProcessingTrack(MediaStreamTrack):
     kind = "video"
@@ -23,21 +55,45 @@ class VideoProcessingTrack(MediaStreamTrack):
         fps: int = 30,
         initial_parameters: dict = None,
         notification_callback: callable = None,
+        pace: bool | None = None,
     ):
         super().__init__()
         self.pipeline_manager = pipeline_manager
         self.initial_parameters = initial_parameters or {}
         self.notification_callback = notification_callback
-        # FPS variables (will be updated from FrameProcessor)
-        self.fps = fps
-        self.frame_ptime = 1.0 / fps
+        # FPS variables (pushed from FrameProcessor when its estimate changes)
+        self._set_fps(fps)
+        # Pacing state, timestamp is None until the first frame has been sent
+        self.timestamp: int | None = None
+        self.start = 0.0
+        self.last_frame_time = 0.0
+        if pace is None:
+            pace = os.environ.get(PACE_OUTPUT_ENV_VAR, "1") != "0"
+        # When False frames are timestamped at the current FPS but never delayed
+        self.pace = pace
 
         self.frame_processor = None
         self.input_task = None
         self.input_task_running = False
+        # Plain attribute since a single bool store or load is atomic under the GIL
         self._paused = False
-        self._paused_lock = threading.Lock()
         self._last_frame = None
+        # Set from the FrameProcessor thread whenever new output frames are queued
+        self._output_ready = asyncio.Event()
+        self._loop = None
+        # Output frame whose planes are overwritten in place for every frame
+        self._out_frame = None
+        self._out_planes: list[np.ndarray] = []
+        self._reuse_out_frame = True
+        # Output frames are fetched and converted off the event loop so that the
+        # copy doesn't stall the other WebRTC coroutines, one thread keeps them
+        # in order and makes reusing the output frame safe
+        self._convert_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="frame-convert",
+            initializer=_pin_current_thread,
+            initargs=(get_convert_cpus(),),
+        )
 
     async def input_loop(self):
         """Background loop that continuously feeds frames to the processor"""
@@ -56,43 +112,73 @@ class VideoProcessingTrack(MediaStreamTrack):
                 self.input_task_running = False
                 break
 
+    def _set_fps(self, fps: float):
+        """Set the output frame rate and the derived per-frame intervals."""
+        self.fps = fps
+        self.frame_ptime = 1.0 / fps
+        # Timestamp increment per frame in clock ticks, cached for next_timestamp
+        self._ts_step = int(self.frame_ptime * VIDEO_CLOCK_RATE)
+
     # Copied from https://github.com/livepeer/fastworld/blob/e649ef788cd33d78af6d8e1da915cd933761535e/backend/track.py#L267
     async def next_timestamp(self) -> tuple[int, fractions.Fraction]:
         """Override to control frame rate"""
         if self.readyState != "live":
             raise MediaStreamError
 
-        if hasattr(self, "timestamp"):
-            # Calculate wait time based on current frame rate
-            current_time = time.time()
-            time_since_last_frame = current_time - self.last_frame_time
-
+        # The event loop's monotonic clock is the one asyncio.sleep() wakes up by, so
+        # deadlines and wakeups are measured the same way, read once per frame
+        current_time = self._loop.time()
+        if self.timestamp is not None:
             # Wait for the appropriate interval based on current FPS
-            target_interval = self.frame_ptime  # Current frame period
-            wait_time = target_interval - time_since_last_frame
+            wait_time = self.frame_ptime - (current_time - self.last_frame_time)
 
-            if wait_time > 0:
+            if wait_time > 0 and self.pace:
                 await asyncio.sleep(wait_time)
+                # Measure the next interval from the deadline rather than reading the
+                # clock again, which also keeps sleep overshoot from accumulating
+                current_time += wait_time
 
             # Update timestamp and last frame time
-            self.timestamp += int(self.frame_ptime * VIDEO_CLOCK_RATE)
-            self.last_frame_time = time.time()
+            self.timestamp += self._ts_step
+            self.last_frame_time = current_time
         else:
-            self.start = time.time()
-            self.last_frame_time = time.time()
+            self.start = current_time
+            self.last_frame_time = current_time
             self.timestamp = 0
 
         return self.timestamp, VIDEO_TIME_BASE
 
     def initialize_output_processing(self):
         if not self.frame_processor:
+            self._loop = asyncio.get_running_loop()
             self.frame_processor = FrameProcessor(
                 pipeline_manager=self.pipeline_manager,
                 initial_parameters=self.initial_parameters,
                 notification_callback=self.notification_callback,
+                output_ready_callback=self._signal_output_ready,
+                fps_callback=self._on_pipeline_fps,
+                # Hand the encoders frames in their native format
+                output_format="yuv420p",
             )
             self.frame_processor.start()
 
+    def _signal_output_ready(self):
+        """Wake recv() from the FrameProcessor worker thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._output_ready.set)
+        except RuntimeError:
+            # The event loop has already been closed
+            pass
+
+    def _on_pipeline_fps(self, fps: float):
+        """Apply a new pipeline FPS pushed from the FrameProcessor worker thread."""
+        try:
+            # Applied on the event loop so next_timestamp sees consistent values
+            self._loop.call_soon_threadsafe(self._set_fps, fps)
+        except RuntimeError:
+            # The event loop has already been closed
+            pass
+
     def initialize_input_processing(self, track: MediaStreamTrack):
         self.track = track
         self.input_task_running = True
@@ -104,26 +190,18 @@ class VideoProcessingTrack(MediaStreamTrack):
         self.initialize_output_processing()
         while self.input_task_running:
             try:
-                # Update FPS from FrameProcessor
-                if self.frame_processor:
-                    self.fps = self.frame_processor.get_current_pipeline_fps()
-                    self.frame_ptime = 1.0 / self.fps
-
-                # If paused, wait for the appropriate frame interval before returning
-                with self._paused_lock:
-                    paused = self._paused
-
                 frame = None
-                if paused:
+                if self._paused:
                     # When video is paused, return the last frame to freeze the playback video
                     frame = self._last_frame
                 else:
                     # When video is not paused, get the next frame from the frame processor
-                    frame_tensor = self.frame_processor.get()
-                    if frame_tensor is not None:
-                        frame = VideoFrame.from_ndarray(
-                            frame_tensor.numpy(), format="rgb24"
-                        )
+                    # Cleared before checking so that output queued after the check
+                    # still wakes the wait below
+                    self._output_ready.clear()
+                    frame = await self._loop.run_in_executor(
+                        self._convert_executor, self._next_video_frame
+                    )
 
                 if frame is not None:
                     pts, time_base = await self.next_timestamp()
@@ -133,8 +211,13 @@ class VideoProcessingTrack(MediaStreamTrack):
                     self._last_frame = frame
                     return frame
 
-                # No frame available, wait a bit before trying again
-                await asyncio.sleep(0.01)
+                # No frame available, wait until the processor queues more output
+                try:
+                    await asyncio.wait_for(
+                        self._output_ready.wait(), OUTPUT_WAIT_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    pass
 
             except Exception as e:
                 logger.error(f"Error getting processed frame: {e}")
@@ -142,10 +225,80 @@ class VideoProcessingTrack(MediaStreamTrack):
 
         raise Exception("Track stopped")
 
+    def _next_video_frame(self) -> VideoFrame | None:
+        """Get the next processed frame as a VideoFrame, or None if there is none."""
+        frame_tensor = self.frame_processor.get()
+        if frame_tensor is None:
+            return None
+        return self._to_video_frame(frame_tensor)
+
+    def _to_video_frame(self, frame_tensor) -> VideoFrame:
+        """
+        Copy a uint8 frame from FrameProcessor.get() into the reused output VideoFrame.
+
+        aiortc encodes each frame before asking for the next one, so a single frame
+        can be handed out again once its planes have been overwritten. This avoids
+        allocating a new frame and its buffers on every tick.
+        """
+        pixels = frame_tensor.numpy()
+        if pixels.ndim == 3:
+            height, width, _ = pixels.shape
+            pixel_format = "rgb24"
+            # Bytes per row of each plane
+            plane_shapes = [(height, width * 3)]
+        else:
+            # Y, U and V planes stacked as (H * 3 / 2, W)
+            height, width = pixels.shape[0] * 2 // 3, pixels.shape[1]
+            pixel_format = "yuv420p"
+            plane_shapes = [(height, width)] + [(height // 2, width // 2)] * 2
+
+        if not self._reuse_out_frame:
+            return VideoFrame.from_ndarray(pixels, format=pixel_format)
+
+        frame = self._out_frame
+        if (
+            frame is None
+            or frame.width != width
+            or frame.height != height
+            or frame.format.name != pixel_format
+        ):
+            frame = VideoFrame(width=width, height=height, format=pixel_format)
+            # Views of the plane pixels are built once per allocated frame so each
+            # tick is just one copy per plane
+            self._out_planes = [
+                self._plane_view(plane, rows, row_bytes)
+                for plane, (rows, row_bytes) in zip(
+                    frame.planes, plane_shapes, strict=True
+                )
+            ]
+            self._out_frame = frame
+
+        try:
+            flat = pixels.reshape(-1)
+            offset = 0
+            for view in self._out_planes:
+                np.copyto(view, flat[offset : offset + view.size].reshape(view.shape))
+                offset += view.size
+        except ValueError as e:
+            # Plane buffers are read-only on some PyAV builds
+            logger.warning(f"Cannot write VideoFrame planes, allocating per frame: {e}")
+            self._reuse_out_frame = False
+            self._out_frame = None
+            self._out_planes = []
+            return VideoFrame.from_ndarray(pixels, format=pixel_format)
+
+        return frame
+
+    @staticmethod
+    def _plane_view(plane, rows: int, row_bytes: int) -> np.ndarray:
+        """Get a (rows, row_bytes) uint8 view of a VideoFrame plane's pixels."""
+        # Rows may be padded, so view the plane with its line size and crop
+        view = np.frombuffer(plane, dtype=np.uint8)[: rows * plane.line_size]
+        return view.reshape(rows, plane.line_size)[:, :row_bytes]
+
     def pause(self, paused: bool):
         """Pause or resume the video track processing"""
-        with self._paused_lock:
-            self._paused = paused
+        self._paused = paused
         logger.info(f"Video track {'paused' if paused else 'resumed'}")
 
     async def stop(self):
@@ -161,4 +314,6 @@ class VideoProcessingTrack(MediaStreamTrack):
         if self.frame_processor is not None:
             self.frame_processor.stop()
 
+        self._convert_executor.shutdown(wait=False, cancel_futures=True)
+
         await super().stop()
@@ -1,10 +1,12 @@
 import asyncio
-import json
+import collections
 import logging
 import os
+import time
 import uuid
 from typing import Any
 
+import orjson
 from aiortc import (
     MediaStreamTrack,
     RTCConfiguration,
@@ -36,6 +38,19 @@ vpx.DEFAULT_BITRATE = 7000000
 vpx.MIN_BITRATE = 5000000
 vpx.MAX_BITRATE = 10000000
 
+# Notifications are held back while more than this many bytes are queued on the
+# data channel, browsers start failing sends at around 2 MB
+DATA_CHANNEL_MAX_BUFFERED_AMOUNT = 2 * 1024 * 1024
+# Held back notifications are sent once the queued bytes drop below this
+DATA_CHANNEL_BUFFERED_AMOUNT_LOW_THRESHOLD = 256 * 1024
+
+# Seconds a TURN configuration is reused for, well within the 600 second lifetime
+# of the requested TURN credentials
+RTC_CONFIG_TTL = 300
+
+# Last TURN configuration and the time.monotonic() at which it was created
+_rtc_config_cache: tuple[RTCConfiguration, float] | None = None
+
 
 class Session:
     """WebRTC Session containing peer connection and associated video track."""
@@ -50,6 +65,8 @@ class Session:
         self.pc = pc
         self.video_track = video_track
         self.data_channel = data_channel
+        # Whether the session is still counted in WebRTCManager's active count
+        self.active = True
 
     async def close(self):
         """Close this session and cleanup resources."""
@@ -72,13 +89,21 @@ class Session:
 class NotificationSender:
     """
     Handles sending notifications from backend to frontend using WebRTC data channels for a single session.
+
+    Notifications may be sent from any thread. They are queued and sent from the
+    event loop, where everything queued by then goes out as one message, so a burst
+    of notifications costs a single loop wakeup and data channel send.
     """
 
     def __init__(self):
         self.data_channel = None
-        self.pending_notifications = []
+        # Appended from any thread and only popped on the event loop
+        self.pending_notifications = collections.deque()
+        # Whether a drain of pending_notifications is already scheduled
+        self._drain_scheduled = False
 
-        # Store reference to the event loop for thread-safe notifications
+        # Store reference to the event loop for thread-safe notifications, this is
+        # the uvloop loop when served by app.py so call_soon_threadsafe is cheap
         self.event_loop = asyncio.get_running_loop()
 
     def set_data_channel(self, data_channel):
@@ -88,30 +113,51 @@ class NotificationSender:
 
     def call(self, message: dict):
         """Send a message to the frontend via data channel."""
+        self.pending_notifications.append(message)
         if self.data_channel and self.data_channel.readyState == "open":
-            self._send_message_threadsafe(message)
+            self._schedule_drain()
         else:
             logger.info(f"Data channel not ready, queuing message: {message}")
-            self.pending_notifications.append(message)
 
-    def _send_message_threadsafe(self, message: dict):
-        """Send a message via data channel in a thread-safe manner"""
+    def _schedule_drain(self):
+        """Schedule sending the pending notifications, unless already scheduled."""
+        if self._drain_scheduled:
+            return
+        self._drain_scheduled = True
         try:
-            message_str = json.dumps(message)
-            # Use thread-safe method to send message
-            if self.event_loop and self.event_loop.is_running():
-                # Schedule the send operation in the main event loop
-                def send_sync():
-                    try:
-                        self.data_channel.send(message_str)
-                        logger.info(f"Sent notification to frontend: {message}")
-                    except Exception as e:
-                        logger.error(f"Failed to send notification: {e}")
+            self.event_loop.call_soon_threadsafe(self._drain)
+        except RuntimeError as e:
+            # The event loop has already been closed
+            self._drain_scheduled = False
+            logger.error(f"Failed to schedule notifications: {e}")
+
+    def _drain(self):
+        """Send all pending notifications in one message. Runs on the event loop."""
+        # Cleared before popping so a message queued from here on schedules a new
+        # drain rather than being left behind
+        self._drain_scheduled = False
+        if not self.data_channel or self.data_channel.readyState != "open":
+            return
+        if self.data_channel.bufferedAmount >= DATA_CHANNEL_MAX_BUFFERED_AMOUNT:
+            # Keep the notifications queued until the bufferedamountlow event
+            return
+
+        messages = []
+        while self.pending_notifications:
+            messages.append(self.pending_notifications.popleft())
+        if not messages:
+            return
 
-                # Schedule the sync function to run in the main event loop
-                self.event_loop.call_soon_threadsafe(send_sync)
+        if len(messages) == 1:
+            payload = messages[0]
+        else:
+            payload = {"type": "batch", "messages": messages}
+        try:
+            # Sent as text since the frontend parses event.data as a string
+            self.data_channel.send(orjson.dumps(payload).decode())
+            logger.info(f"Sent notifications to frontend: {messages}")
         except Exception as e:
-            logger.error(f"Failed to send notification: {e}")
+            logger.error(f"Failed to send notifications: {e}")
 
     def flush_pending_notifications(self):
         """Send all pending notifications when data channel becomes available"""
@@ -120,9 +166,7 @@ class NotificationSender:
             return
 
         logger.info(f"Flushing {len(self.pending_notifications)} pending notifications")
-        for message in self.pending_notifications:
-            self._send_message_threadsafe(message)
-        self.pending_notifications.clear()
+        self._schedule_drain()
 
 
 class WebRTCManager:
@@ -132,6 +176,9 @@ class WebRTCManager:
 
     def __init__(self):
         self.sessions: dict[str, Session] = {}
+        # Sessions whose connection has not closed or failed, kept up to date so
+        # stats polls do not walk all sessions
+        self._active_count = 0
         self.rtc_config = create_rtc_config()
         self.is_first_track = True
 
@@ -162,6 +209,7 @@ class WebRTCManager:
             pc = RTCPeerConnection(self.rtc_config)
             session = Session(pc)
             self.sessions[session.id] = session
+            self._active_count += 1
 
             # Create NotificationSender for this session to send notifications to the frontend
             notification_sender = NotificationSender()
@@ -188,6 +236,7 @@ class WebRTCManager:
                     f"Connection state changed to: {pc.connectionState} for session {session.id}"
                 )
                 if pc.connectionState in ["closed", "failed"]:
+                    self._deactivate(session)
                     await self.remove_session(session.id)
 
             @pc.on("iceconnectionstatechange")
@@ -213,6 +262,9 @@ class WebRTCManager:
                     f"Data channel received: {data_channel.label} for session {session.id}"
                 )
                 session.data_channel = data_channel
+                data_channel.bufferedAmountLowThreshold = (
+                    DATA_CHANNEL_BUFFERED_AMOUNT_LOW_THRESHOLD
+                )
                 notification_sender.set_data_channel(data_channel)
 
                 @data_channel.on("open")
@@ -220,11 +272,15 @@ class WebRTCManager:
                     logger.info(f"Data channel opened for session {session.id}")
                     notification_sender.flush_pending_notifications()
 
+                @data_channel.on("bufferedamountlow")
+                def on_data_channel_buffered_amount_low():
+                    notification_sender.flush_pending_notifications()
+
                 @data_channel.on("message")
                 def on_data_channel_message(message):
                     try:
                         # Parse the JSON message
-                        data = json.loads(message)
+                        data = orjson.loads(message)
                         logger.info(f"Received parameter update: {data}")
 
                         # Check for paused parameter and call pause() method on video track
@@ -241,7 +297,7 @@ class WebRTCManager:
                                 "No frame processor available for parameter update"
                             )
 
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         logger.error(f"Failed to parse parameter update message: {e}")
                     except Exception as e:
                         logger.error(f"Error handling parameter update: {e}")
@@ -266,11 +322,18 @@ class WebRTCManager:
         """Remove and cleanup a specific session."""
         if session_id in self.sessions:
             session = self.sessions.pop(session_id)
+            self._deactivate(session)
             logger.info(f"Removing session: {session}")
             await session.close()
         else:
             logger.warning(f"Attempted to remove non-existent session: {session_id}")
 
+    def _deactivate(self, session: Session):
+        """Stop counting a session as active, only the first call has an effect."""
+        if session.active:
+            session.active = False
+            self._active_count -= 1
+
     def get_session(self, session_id: str) -> Session | None:
         """Get a session by ID."""
         return self.sessions.get(session_id)
@@ -281,13 +344,7 @@ class WebRTCManager:
 
     def get_active_session_count(self) -> int:
         """Get count of active sessions."""
-        return len(
-            [
-                s
-                for s in self.sessions.values()
-                if s.pc.connectionState not in ["closed", "failed"]
-            ]
-        )
+        return self._active_count
 
     async def stop(self):
         """Close and cleanup all sessions."""
@@ -298,10 +355,23 @@ class WebRTCManager:
 
         # Clear the sessions dict
         self.sessions.clear()
+        self._active_count = 0
 
 
 def create_rtc_config() -> RTCConfiguration:
-    """Setup RTCConfiguration with TURN credentials if available."""
+    """
+    Setup RTCConfiguration with TURN credentials if available.
+
+    A TURN configuration is reused for RTC_CONFIG_TTL seconds so that creating
+    several managers does not request new credentials from the provider each time.
+    """
+    global _rtc_config_cache
+
+    if _rtc_config_cache is not None:
+        config, created_at = _rtc_config_cache
+        if time.monotonic() - created_at < RTC_CONFIG_TTL:
+            return config
+
     try:
         hf_token = os.getenv("HF_TOKEN")
         twilio_account_sid = os.getenv("TWILIO_ACCOUNT_SID")
@@ -320,7 +390,9 @@ def create_rtc_config() -> RTCConfiguration:
             logger.info(
                 f"RTCConfiguration created with {turn_provider} and {len(ice_servers)} ICE servers"
             )
-            return RTCConfiguration(iceServers=ice_servers)
+            config = RTCConfiguration(iceServers=ice_servers)
+            _rtc_config_cache = (config, time.monotonic())
+            return config
         else:
             logger.info(
                 "No Twilio or HF_TOKEN credentials found, using default STUN server"
@@ -139,6 +139,11 @@ class FlowMatchScheduler:
         if self.reverse_sigmas:
             self.sigmas = 1 - self.sigmas
         self.timesteps = self.sigmas * self.num_train_timesteps
+        # Ascending copy of the timesteps with the index of each entry in
+        # self.timesteps, for nearest timestep lookups with a binary search
+        self._sorted_timesteps, self._sorted_timestep_ids = torch.sort(self.timesteps)
+        # Sigmas shaped to broadcast against [B, C, H, W] samples
+        self._sigmas_lut = self.sigmas.view(-1, 1, 1, 1)
         if training:
             x = self.timesteps
             y = torch.exp(
@@ -148,19 +153,48 @@ class FlowMatchScheduler:
             bsmntw_weighing = y_shifted * (num_inference_steps / y_shifted.sum())
             self.linear_timesteps_weights = bsmntw_weighing
 
+    def timestep_ids(self, timestep: torch.Tensor) -> torch.Tensor:
+        """
+        Get the index of the nearest entry in self.timesteps for each timestep.
+
+        Same result as argmin(|self.timesteps - timestep|) per timestep, but found
+        with a binary search instead of building a [B, T] distance matrix.
+        timestep has shape [B], the result is a [B] index tensor on its device.
+        """
+        if self._sorted_timesteps.device != timestep.device:
+            self._sorted_timesteps = self._sorted_timesteps.to(timestep.device)
+            self._sorted_timestep_ids = self._sorted_timestep_ids.to(timestep.device)
+        sorted_timesteps = self._sorted_timesteps
+        timestep = timestep.to(sorted_timesteps.dtype)
+
+        # First entry >= timestep and the one below it, both kept in range
+        upper = torch.searchsorted(sorted_timesteps, timestep).clamp_(
+            1, len(sorted_timesteps) - 1
+        )
+        lower = upper - 1
+        # Ties go to the larger timestep, which comes first in a descending schedule
+        use_lower = (timestep - sorted_timesteps[lower]) < (
+            sorted_timesteps[upper] - timestep
+        )
+        return self._sorted_timestep_ids[torch.where(use_lower, lower, upper)]
+
+    def sigmas_at(self, timestep_id: torch.Tensor) -> torch.Tensor:
+        """Get the sigmas of timestep ids as a [B, 1, 1, 1] tensor on their device."""
+        if self._sigmas_lut.device != timestep_id.device:
+            self._sigmas_lut = self._sigmas_lut.to(timestep_id.device)
+        return self._sigmas_lut[timestep_id]
+
     def step(self, model_output, timestep, sample, to_final=False):
         if timestep.ndim == 2:
             timestep = timestep.flatten(0, 1)
         self.sigmas = self.sigmas.to(model_output.device)
         self.timesteps = self.timesteps.to(model_output.device)
-        timestep_id = torch.argmin(
-            (self.timesteps.unsqueeze(0) - timestep.unsqueeze(1)).abs(), dim=1
-        )
-        sigma = self.sigmas[timestep_id].reshape(-1, 1, 1, 1)
+        timestep_id = self.timestep_ids(timestep)
+        sigma = self.sigmas_at(timestep_id)
         if to_final or (timestep_id + 1 >= len(self.timesteps)).any():
             sigma_ = 1 if (self.inverse_timesteps or self.reverse_sigmas) else 0
         else:
-            sigma_ = self.sigmas[timestep_id + 1].reshape(-1, 1, 1, 1)
+            sigma_ = self.sigmas_at(timestep_id + 1)
         prev_sample = sample + model_output * (sigma_ - sigma)
         return prev_sample
 
@@ -177,10 +211,8 @@ class FlowMatchScheduler:
             timestep = timestep.flatten(0, 1)
         self.sigmas = self.sigmas.to(noise.device)
         self.timesteps = self.timesteps.to(noise.device)
-        timestep_id = torch.argmin(
-            (self.timesteps.unsqueeze(0) - timestep.unsqueeze(1)).abs(), dim=1
-        )
-        sigma = self.sigmas[timestep_id].reshape(-1, 1, 1, 1)
+        timestep_id = self.timestep_ids(timestep)
+        sigma = self.sigmas_at(timestep_id)
         sample = (1 - sigma) * original_samples + sigma * noise
         return sample.type_as(noise)
 
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: CC-BY-NC-SA-4.0
 import os
 import types
+from collections import OrderedDict
 
 import torch
 from safetensors import safe_open
@@ -14,6 +15,9 @@ from .modules.tokenizers import HuggingfaceTokenizer
 from .modules.vae import _video_vae
 from .scheduler import FlowMatchScheduler, SchedulerInterface
 
+# Number of distinct prompt lists whose tokens are kept on the encoder device
+TOKEN_CACHE_SIZE = 32
+
 
 class WanTextEncoder(torch.nn.Module):
     def __init__(
@@ -23,6 +27,10 @@ class WanTextEncoder(torch.nn.Module):
         tokenizer_path: str | None = None,
     ) -> None:
         super().__init__()
+        # Device of the parameters, looked up lazily and reset whenever they move
+        self._device = None
+        # Tokenized prompts on self.device keyed by the prompt tuple, in LRU order
+        self._token_cache = OrderedDict()
 
         # Determine paths with priority: specific paths > model_dir > default
         if text_encoder_path is None:
@@ -61,7 +69,15 @@ class WanTextEncoder(torch.nn.Module):
 
     @property
     def device(self):
-        return next(self.parameters()).device
+        if self._device is None:
+            self._device = next(self.parameters()).device
+        return self._device
+
+    def _apply(self, fn, recurse=True):
+        # Every .to()/.cuda()/.cpu() etc. goes through here
+        self._device = None
+        self._token_cache.clear()
+        return super()._apply(fn, recurse)
 
     def _load_state_dict(self, weights_path: str) -> dict:
         """Load text encoder weights with automatic format detection."""
@@ -79,8 +95,10 @@ class WanTextEncoder(torch.nn.Module):
 
         elif weights_path.endswith(".pth") or weights_path.endswith(".pt"):
             # Load from PyTorch format (assume already in correct format)
+            # The tensors are memory mapped from the file rather than read into
+            # memory, and load_state_dict(assign=True) adopts them as is
             state_dict = torch.load(
-                weights_path, map_location="cpu", weights_only=False
+                weights_path, map_location="cpu", weights_only=False, mmap=True
             )
 
         else:
@@ -90,18 +108,31 @@ class WanTextEncoder(torch.nn.Module):
 
         return state_dict
 
-    def forward(self, text_prompts: list[str]) -> dict:
+    def _tokenize(self, text_prompts: list[str]) -> tuple[torch.Tensor, torch.Tensor]:
+        """Tokenize prompts onto the encoder device, reusing recent results."""
+        key = tuple(text_prompts)
+        cached = self._token_cache.get(key)
+        if cached is not None:
+            self._token_cache.move_to_end(key)
+            return cached
+
         ids, mask = self.tokenizer(
             text_prompts, return_mask=True, add_special_tokens=True
         )
-        ids = ids.to(self.device)
-        mask = mask.to(self.device)
-        seq_lens = mask.gt(0).sum(dim=1).long()
+        cached = (ids.to(self.device), mask.to(self.device))
+        self._token_cache[key] = cached
+        if len(self._token_cache) > TOKEN_CACHE_SIZE:
+            self._token_cache.popitem(last=False)
+        return cached
+
+    def forward(self, text_prompts: list[str]) -> dict:
+        ids, mask = self._tokenize(text_prompts)
         context = self.text_encoder(ids, mask)
         # ids = ids.to(torch.device('cpu'))
         # mask = mask.to(torch.device('cpu'))
-        for u, v in zip(context, seq_lens, strict=False):
-            u[v:] = 0.0  # set padding to 0.0
+        # Set padding to 0.0 for all prompts at once, the tokenizer pads on the
+        # right so this is the same as zeroing everything past each seq_len
+        context.masked_fill_(mask.unsqueeze(-1) == 0, 0.0)
 
         return {"prompt_embeds": context}
 
@@ -149,8 +180,14 @@ class WanVAEWrapper(torch.nn.Module):
             2.8251,
             1.9160,
         ]
-        self.mean = torch.tensor(mean, dtype=torch.float32)
-        self.std = torch.tensor(std, dtype=torch.float32)
+        # Buffers follow the module to its device and dtype, so building the scale
+        # in encode/decode normally needs neither a copy nor a division
+        self.register_buffer(
+            "mean", torch.tensor(mean, dtype=torch.float32), persistent=False
+        )
+        self.register_buffer(
+            "inv_std", 1.0 / torch.tensor(std, dtype=torch.float32), persistent=False
+        )
 
         # init model
         vae_path = os.path.join(model_dir, "Wan2.1-T2V-1.3B/Wan2.1_VAE.pth")
@@ -163,47 +200,52 @@ class WanVAEWrapper(torch.nn.Module):
             .requires_grad_(False)
         )
 
+    def _get_scale(self, x: torch.Tensor) -> list[torch.Tensor]:
+        """Latent normalization [mean, 1 / std] on the device and dtype of x."""
+        return [
+            self.mean.to(device=x.device, dtype=x.dtype),
+            self.inv_std.to(device=x.device, dtype=x.dtype),
+        ]
+
     def encode_to_latent(self, pixel: torch.Tensor) -> torch.Tensor:
         # pixel: [batch_size, num_channels, num_frames, height, width]
-        device, dtype = pixel.device, pixel.dtype
-        scale = [
-            self.mean.to(device=device, dtype=dtype),
-            1.0 / self.std.to(device=device, dtype=dtype),
-        ]
+        scale = self._get_scale(pixel)
 
-        output = [
-            self.model.encode(u.unsqueeze(0), scale).float().squeeze(0) for u in pixel
-        ]
-        output = torch.stack(output, dim=0)
+        # The VAE handles any batch size, so encode the whole batch in one call
+        # instead of launching every layer once per sample
+        output = self.model.encode(pixel, scale).float()
         # from [batch_size, num_channels, num_frames, height, width]
         # to [batch_size, num_frames, num_channels, height, width]
         output = output.permute(0, 2, 1, 3, 4)
         return output
 
     def decode_to_pixel(
-        self, latent: torch.Tensor, use_cache: bool = False
+        self,
+        latent: torch.Tensor,
+        use_cache: bool = False,
+        output_dtype: torch.dtype | None = torch.float32,
     ) -> torch.Tensor:
+        """
+        Decode latents to pixels in [-1, 1].
+
+        output_dtype=None keeps the decoder's dtype, for callers that convert the
+        pixels themselves and don't need an intermediate fp32 copy.
+        """
         zs = latent.permute(0, 2, 1, 3, 4)
         if use_cache:
             assert latent.shape[0] == 1, "Batch size must be 1 when using cache"
 
-        device, dtype = latent.device, latent.dtype
-        scale = [
-            self.mean.to(device=device, dtype=dtype),
-            1.0 / self.std.to(device=device, dtype=dtype),
-        ]
+        scale = self._get_scale(latent)
 
         if use_cache:
             decode_function = self.model.cached_decode
         else:
             decode_function = self.model.decode
 
-        output = []
-        for u in zs:
-            output.append(
-                decode_function(u.unsqueeze(0), scale).float().clamp_(-1, 1).squeeze(0)
-            )
-        output = torch.stack(output, dim=0)
+        # Decode the whole batch in one call, see encode_to_latent
+        output = decode_function(zs, scale).clamp_(-1, 1)
+        if output_dtype is not None:
+            output = output.to(output_dtype)
         # from [batch_size, num_channels, num_frames, height, width]
         # to [batch_size, num_frames, num_channels, height, width]
         output = output.permute(0, 2, 1, 3, 4)
@@ -283,26 +325,20 @@ class WanDiffusionWrapper(torch.nn.Module):
     ) -> torch.Tensor:
         """
         Convert flow matching's prediction to x0 prediction.
-        flow_pred: the prediction with shape [B, C, H, W]
-        xt: the input noisy data with shape [B, C, H, W]
-        timestep: the timestep with shape [B]
+        flow_pred: the prediction with shape [B, C, H, W] or [B, F, C, H, W]
+        xt: the input noisy data with the same shape as flow_pred
+        timestep: the timestep with shape [B] or [B, F]
 
         pred = noise - x0
         x_t = (1-sigma_t) * x0 + sigma_t * noise
         we have x0 = x_t - sigma_t * pred
         see derivations https://chatgpt.com/share/67bf8589-3d04-8008-bc6e-4cf1a24e2d0e
         """
-        # use higher precision for calculations
+        # sigma_t is fp32, so with bf16 inputs type promotion already does the math
+        # in fp32, which is plenty for a single multiply-subtract with sigma in [0, 1]
         original_dtype = flow_pred.dtype
-        flow_pred, xt, sigmas, timesteps = map(
-            lambda x: x.double().to(flow_pred.device),
-            [flow_pred, xt, self.scheduler.sigmas, self.scheduler.timesteps],
-        )
-
-        timestep_id = torch.argmin(
-            (timesteps.unsqueeze(0) - timestep.unsqueeze(1)).abs(), dim=1
-        )
-        sigma_t = sigmas[timestep_id].reshape(-1, 1, 1, 1)
+        timestep_id = self.scheduler.timestep_ids(timestep.flatten())
+        sigma_t = self.scheduler.sigmas_at(timestep_id).view(*timestep.shape, 1, 1, 1)
         x0_pred = xt - sigma_t * flow_pred
         return x0_pred.to(original_dtype)
 
@@ -312,22 +348,17 @@ class WanDiffusionWrapper(torch.nn.Module):
     ) -> torch.Tensor:
         """
         Convert x0 prediction to flow matching's prediction.
-        x0_pred: the x0 prediction with shape [B, C, H, W]
-        xt: the input noisy data with shape [B, C, H, W]
-        timestep: the timestep with shape [B]
+        x0_pred: the x0 prediction with shape [B, C, H, W] or [B, F, C, H, W]
+        xt: the input noisy data with the same shape as x0_pred
+        timestep: the timestep with shape [B] or [B, F]
 
         pred = (x_t - x_0) / sigma_t
         """
-        # use higher precision for calculations
+        # Computed in fp32 through type promotion with sigma_t, see
+        # _convert_flow_pred_to_x0
         original_dtype = x0_pred.dtype
-        x0_pred, xt, sigmas, timesteps = map(
-            lambda x: x.double().to(x0_pred.device),
-            [x0_pred, xt, scheduler.sigmas, scheduler.timesteps],
-        )
-        timestep_id = torch.argmin(
-            (timesteps.unsqueeze(0) - timestep.unsqueeze(1)).abs(), dim=1
-        )
-        sigma_t = sigmas[timestep_id].reshape(-1, 1, 1, 1)
+        timestep_id = scheduler.timestep_ids(timestep.flatten())
+        sigma_t = scheduler.sigmas_at(timestep_id).view(*timestep.shape, 1, 1, 1)
         flow_pred = (xt - x0_pred) / sigma_t
         return flow_pred.to(original_dtype)
 
@@ -399,11 +430,11 @@ class WanDiffusionWrapper(torch.nn.Module):
                         seq_len=self.seq_len,
                     ).permute(0, 2, 1, 3, 4)
 
+        # flow_pred is a permuted view of the model output, so convert it as is
+        # with per frame sigmas rather than flattening it, which would copy it
         pred_x0 = self._convert_flow_pred_to_x0(
-            flow_pred=flow_pred.flatten(0, 1),
-            xt=noisy_image_or_video.flatten(0, 1),
-            timestep=timestep.flatten(0, 1),
-        ).unflatten(0, flow_pred.shape[:2])
+            flow_pred=flow_pred, xt=noisy_image_or_video, timestep=timestep
+        )
 
         if logits is not None:
             return flow_pred, pred_x0, logits
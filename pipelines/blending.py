@@ -8,6 +8,7 @@ logger = logging.getLogger(__name__)
 # Numerical stability constants
 EPSILON = 1e-8  # Small value to prevent division by zero
 SLERP_PARALLEL_THRESHOLD = 1e-4  # Threshold for detecting parallel embeddings in SLERP
+WEIGHT_SUM_TOLERANCE = 1e-6  # Weights summing to 1.0 within this are not rescaled
 
 # Cache configuration
 DEFAULT_MAX_CACHE_SIZE = 10  # Maximum number of prompts to cache
@@ -19,46 +20,53 @@ LOG_PROMPT_PREVIEW_LENGTH = 50  # Characters to show in log messages for prompt
 DEFAULT_PROMPT_WEIGHT = 1.0  # Default weight for prompt blending
 
 
+def _prompts_signature(prompts) -> tuple:
+    """Hashable (text, weight) pairs that identify a list of prompts"""
+    return tuple(
+        (p.get("text", ""), p.get("weight", DEFAULT_PROMPT_WEIGHT)) for p in prompts
+    )
+
+
 def normalize_weights(weights, dtype, device) -> torch.Tensor:
     """Normalize weights to sum to 1.0"""
-    weights_tensor = torch.tensor(weights, dtype=dtype, device=device)
-    total = weights_tensor.sum()
-    if total > 0:
-        weights_tensor = weights_tensor / total
-    else:
+    # Normalized in Python so only the result is copied to the device and checking
+    # the total does not wait on the device
+    weights = [float(weight) for weight in weights]
+    total = sum(weights)
+    if total <= 0:
         # Fallback: equal weights for all inputs
-        weights_tensor = torch.ones_like(weights_tensor) / len(weights_tensor)
+        weights = [1.0 / len(weights)] * len(weights)
         logger.warning(
             "normalize_weights: All weights zero or negative, using equal weights"
         )
-    return weights_tensor
+    elif abs(total - 1.0) > WEIGHT_SUM_TOLERANCE:
+        weights = [weight / total for weight in weights]
+    return torch.tensor(weights, dtype=dtype, device=device)
 
 
 def slerp(embed1, embed2, t) -> torch.Tensor:
     """Spherical linear interpolation between two embeddings"""
-    # Normalize embeddings
-    embed1_norm = embed1 / (embed1.norm(dim=-1, keepdim=True) + EPSILON)
-    embed2_norm = embed2 / (embed2.norm(dim=-1, keepdim=True) + EPSILON)
-
-    # Compute angle between embeddings
-    dot_product = (embed1_norm * embed2_norm).sum(dim=-1, keepdim=True)
+    # Compute angle between embeddings from the per vector norms instead of
+    # normalizing both embeddings, which would create two full size copies
+    norm1 = embed1.norm(dim=-1, keepdim=True) + EPSILON
+    norm2 = embed2.norm(dim=-1, keepdim=True) + EPSILON
+    dot_product = (embed1 * embed2).sum(dim=-1, keepdim=True) / (norm1 * norm2)
     # Clamp to avoid numerical issues with acos
     dot_product = torch.clamp(dot_product, -1.0, 1.0)
     omega = torch.acos(dot_product)
 
     # Fall back to linear interpolation when embeddings are nearly parallel
     if omega.abs().max() < SLERP_PARALLEL_THRESHOLD:
-        return (1.0 - t) * embed1 + t * embed2
+        return torch.lerp(embed1, embed2, t)
 
     sin_omega = torch.sin(omega)
 
-    # Compute interpolation coefficients
+    # Compute interpolation coefficients, these only have one value per vector
     coeff1 = torch.sin((1.0 - t) * omega) / (sin_omega + EPSILON)
     coeff2 = torch.sin(t * omega) / (sin_omega + EPSILON)
 
-    # Interpolate
-    result = coeff1 * embed1 + coeff2 * embed2
-    return result
+    # Interpolate, adding the second term in place of a separate add
+    return torch.addcmul(coeff1 * embed1, coeff2, embed2)
 
 
 def blend_embeddings(embeddings, weights, method, dtype, device) -> torch.Tensor | None:
@@ -77,16 +85,16 @@ def blend_embeddings(embeddings, weights, method, dtype, device) -> torch.Tensor
         combined_embeds = slerp(embeddings[0], embeddings[1], t)
     else:
         # Linear interpolation (weighted average) with normalization
-        # Compute weighted average of norms to preserve magnitude
-        target_norm = sum(
-            embed.norm() * weight
-            for embed, weight in zip(embeddings, normalized_weights, strict=False)
-        )
+        stacked_embeds = torch.stack(embeddings)
+        weights = normalized_weights.to(stacked_embeds.dtype)
+
+        # Compute weighted average of norms to preserve magnitude, with all norms
+        # reduced in one call
+        norms = torch.linalg.vector_norm(stacked_embeds.flatten(1), dim=1)
+        target_norm = torch.dot(norms, weights)
 
-        # Compute linear blend
-        combined_embeds = torch.zeros_like(embeddings[0])
-        for embed, weight in zip(embeddings, normalized_weights, strict=False):
-            combined_embeds += weight * embed
+        # Compute linear blend as one weighted sum over the stacked embeddings
+        combined_embeds = torch.tensordot(weights, stacked_embeds, dims=1)
 
         # Normalize to preserve embedding magnitude and prevent artifacts
         current_norm = combined_embeds.norm()
@@ -100,32 +108,36 @@ class PromptBlender:
     """Manages prompt caching and blending for pipelines"""
 
     def __init__(
-        self, device, dtype, max_cache_size: int = DEFAULT_MAX_CACHE_SIZE
+        self,
+        device,
+        dtype,
+        max_cache_size: int = DEFAULT_MAX_CACHE_SIZE,
+        low_memory: bool = False,
     ) -> None:
         self.device = device
         self.dtype = dtype
         self.max_cache_size = max_cache_size
+        # In low memory mode cached embeddings are kept in CPU memory and only the
+        # ones being blended are copied to the device they were encoded on
+        self.low_memory = low_memory
         self._prompt_cache = OrderedDict()  # LRU cache using OrderedDict
+        self._embedding_device = None
         self._current_prompts = []
+        # Signature of _current_prompts, kept so should_update() only builds one
+        self._current_signature = ()
         self._interpolation_method = "linear"
+        # Last blended embeddings and the (prompts, method) signature they came from
+        self._last_blend_signature = None
+        self._last_blend = None
 
     def should_update(self, prompts, interpolation_method) -> bool:
         """Check if prompts or interpolation method changed"""
         if prompts is None:
             return False
 
-        # Compare as tuples for simple equality check
-        new_comparable = [
-            (p.get("text", ""), p.get("weight", DEFAULT_PROMPT_WEIGHT)) for p in prompts
-        ]
-        old_comparable = [
-            (p.get("text", ""), p.get("weight", DEFAULT_PROMPT_WEIGHT))
-            for p in self._current_prompts
-        ]
-
         return (
-            new_comparable != old_comparable
-            or interpolation_method != self._interpolation_method
+            interpolation_method != self._interpolation_method
+            or _prompts_signature(prompts) != self._current_signature
         )
 
     def blend(self, prompts, interpolation_method, text_encoder) -> torch.Tensor | None:
@@ -141,41 +153,94 @@ class PromptBlender:
             logger.warning("PromptBlender: No prompts set, using empty prompt")
             self._current_prompts = [{"text": "", "weight": DEFAULT_PROMPT_WEIGHT}]
 
-        embeddings = []
-        weights = []
+        self._current_signature = _prompts_signature(self._current_prompts)
 
-        # Encode and cache prompts
-        for prompt in self._current_prompts:
-            prompt_text = prompt.get("text", "")
-            weight = prompt.get("weight", DEFAULT_PROMPT_WEIGHT)
+        # Reuse the last blend when neither the prompts nor the method changed
+        signature = (self._current_signature, self._interpolation_method)
+        if signature == self._last_blend_signature:
+            return self._last_blend
 
-            if prompt_text not in self._prompt_cache:
-                # Evict oldest entry if cache is full (LRU eviction)
-                if len(self._prompt_cache) >= self.max_cache_size:
-                    oldest_key = next(iter(self._prompt_cache))
-                    self._prompt_cache.pop(oldest_key)
-                    logger.info(
-                        f"PromptBlender: Evicted oldest cache entry: {oldest_key[:LOG_PROMPT_PREVIEW_LENGTH]}..."
-                    )
-
-                logger.info(
-                    f"PromptBlender: Encoding and caching prompt: {prompt_text[:LOG_PROMPT_PREVIEW_LENGTH]}..."
-                )
-                encoded = text_encoder(text_prompts=[prompt_text])
-                # Detach from computation graph to prevent memory leak
-                self._prompt_cache[prompt_text] = encoded["prompt_embeds"].detach()
-            else:
-                # Move to end (mark as recently used)
-                self._prompt_cache.move_to_end(prompt_text)
+        texts = [prompt.get("text", "") for prompt in self._current_prompts]
+        weights = [
+            prompt.get("weight", DEFAULT_PROMPT_WEIGHT)
+            for prompt in self._current_prompts
+        ]
 
-            embeddings.append(self._prompt_cache[prompt_text])
-            weights.append(weight)
+        # Encode all prompts missing from the cache in a single batch
+        embeddings = [self._get_cached_embedding(text) for text in texts]
+        missing_texts = list(
+            dict.fromkeys(
+                text
+                for text, embedding in zip(texts, embeddings, strict=True)
+                if embedding is None
+            )
+        )
+        if missing_texts:
+            encoded = self._encode_and_cache(missing_texts, text_encoder)
+            embeddings = [
+                encoded[text] if embedding is None else embedding
+                for text, embedding in zip(texts, embeddings, strict=True)
+            ]
 
         if not embeddings:
             logger.warning("PromptBlender: No cached embeddings found")
             return None
 
         # Use the utility function for actual blending
-        return blend_embeddings(
+        combined_embeds = blend_embeddings(
             embeddings, weights, self._interpolation_method, self.dtype, self.device
         )
+        self._last_blend_signature = signature
+        self._last_blend = combined_embeds
+        return combined_embeds
+
+    def _get_cached_embedding(self, prompt_text) -> torch.Tensor | None:
+        """Get the cached embedding of a prompt, or None on a cache miss"""
+        try:
+            embedding = self._prompt_cache[prompt_text]
+        except KeyError:
+            return None
+
+        # Mark as recently used
+        self._prompt_cache.move_to_end(prompt_text)
+        if self.low_memory:
+            return embedding.to(self._embedding_device, non_blocking=True)
+        return embedding
+
+    def _encode_and_cache(self, prompt_texts, text_encoder) -> dict:
+        """Encode prompts in one batch and cache each embedding"""
+        for prompt_text in prompt_texts:
+            logger.info(
+                f"PromptBlender: Encoding and caching prompt: {prompt_text[:LOG_PROMPT_PREVIEW_LENGTH]}..."
+            )
+        encoded = text_encoder(text_prompts=prompt_texts)
+        # Detach from computation graph to prevent memory leak
+        prompt_embeds = encoded["prompt_embeds"].detach()
+
+        embeddings = {}
+        for index, prompt_text in enumerate(prompt_texts):
+            embedding = prompt_embeds[index : index + 1]
+            if len(prompt_texts) > 1:
+                # Copied so evicting one prompt does not keep the whole batch alive
+                embedding = embedding.clone()
+            embeddings[prompt_text] = embedding
+
+            # Evict oldest entry if cache is full (LRU eviction)
+            if len(self._prompt_cache) >= self.max_cache_size:
+                oldest_key, _ = self._prompt_cache.popitem(last=False)
+                logger.info(
+                    f"PromptBlender: Evicted oldest cache entry: {oldest_key[:LOG_PROMPT_PREVIEW_LENGTH]}..."
+                )
+
+            if self.low_memory:
+                self._embedding_device = embedding.device
+                # Pinned so the copy back to the device can be asynchronous
+                cpu_embedding = torch.empty(
+                    embedding.shape,
+                    dtype=embedding.dtype,
+                    pin_memory=torch.cuda.is_available(),
+                )
+                self._prompt_cache[prompt_text] = cpu_embedding.copy_(embedding)
+            else:
+                self._prompt_cache[prompt_text] = embedding
+        return embeddings
@@ -44,3 +44,27 @@ class Pipeline(ABC):
             A processed chunk tensor in THWC format and [0, 1] range
         """
         pass
+
+    def warmup(self, height: int, width: int) -> None:
+        """
+        Process one chunk of blank frames so that one-time costs such as cuDNN
+        algorithm selection and allocator growth are paid at load time rather than
+        on the first chunk of a stream.
+
+        This leaves behind state (caches, prompts, indices) so the next prepare()
+        must be called with should_prepare=True.
+
+        Args:
+            height: Frame height the pipeline was loaded with
+            width: Frame width the pipeline was loaded with
+        """
+        requirements = self.prepare(should_prepare=True)
+        input = None
+        if requirements is not None:
+            input = [
+                torch.zeros((1, height, width, 3), dtype=torch.uint8)
+                for _ in range(requirements.input_size)
+            ]
+
+        with torch.no_grad():
+            self(input)
@@ -62,6 +62,15 @@ class InferencePipeline(torch.nn.Module):
         self.batch_size = 1
         self.local_attn_size = config.model_kwargs.local_attn_size
         self.recache_buffer = None
+        # recache_buffer is a ring of latent frames, this is where the next one goes
+        self.recache_pos = 0
+        # Preallocated noise for the first and the intermediate denoising steps
+        self.noise_buffer = None
+        self.step_noise_buffer = None
+        # Zero timesteps for the clean context passes, sliced to the frames needed
+        self.zero_timestep = None
+        # Random number generator reseeded for every block of latents
+        self.rng = None
         self.num_frame_per_block = getattr(config, "num_frame_per_block", 1)
 
         print(f"KV inference with {self.num_frame_per_block} frames per block")
@@ -72,7 +81,22 @@ class InferencePipeline(torch.nn.Module):
         self.conditional_dict = None
         self.current_start = 0
 
-    @torch.no_grad()
+        # dtype and device of the generator parameters, looked up lazily and reset
+        # whenever they move
+        self._generator_meta = None
+
+    def _generator_dtype_device(self) -> tuple[torch.dtype, torch.device]:
+        if self._generator_meta is None:
+            param = next(self.generator.model.parameters())
+            self._generator_meta = (param.dtype, param.device)
+        return self._generator_meta
+
+    def _apply(self, fn, recurse=True):
+        # Every .to()/.cuda()/.cpu() etc. goes through here
+        self._generator_meta = None
+        return super()._apply(fn, recurse)
+
+    @torch.inference_mode()
     def prepare(
         self,
         prompts: list[str] = None,
@@ -91,8 +115,11 @@ class InferencePipeline(torch.nn.Module):
 
         if prompts is not None:
             # Make sure text encoder is on right device
-            generator_device = next(self.generator.model.parameters()).device
-            self.text_encoder = self.text_encoder.to(generator_device)
+            # Skipped when already there since .to() walks every parameter and
+            # drops the text encoder's tokenized prompt cache
+            _, generator_device = self._generator_dtype_device()
+            if self.text_encoder.device != generator_device:
+                self.text_encoder = self.text_encoder.to(generator_device)
 
             self.conditional_dict = self.text_encoder(text_prompts=prompts)
             if self.batch_size > 1:
@@ -126,17 +153,17 @@ class InferencePipeline(torch.nn.Module):
         # Only support local attention
         kv_cache_size = self.local_attn_size * self.frame_seq_length
 
-        generator_param = next(self.generator.model.parameters())
+        generator_dtype, generator_device = self._generator_dtype_device()
         self._initialize_kv_cache(
             batch_size=self.batch_size,
-            dtype=generator_param.dtype,
-            device=generator_param.device,
+            dtype=generator_dtype,
+            device=generator_device,
             kv_cache_size_override=kv_cache_size,
         )
         self._initialize_crossattn_cache(
             batch_size=self.batch_size,
-            dtype=generator_param.dtype,
-            device=generator_param.device,
+            dtype=generator_dtype,
+            device=generator_device,
         )
 
         self.generator.model.local_attn_size = self.local_attn_size
@@ -155,48 +182,54 @@ class InferencePipeline(torch.nn.Module):
                 latent_height,
                 latent_width,
             ],
-            dtype=generator_param.dtype,
-            device=generator_param.device
-            if not self.low_memory
-            else torch.device("cpu"),
+            dtype=generator_dtype,
+            device=generator_device if not self.low_memory else torch.device("cpu"),
+        )
+        self.recache_pos = 0
+
+        noise_shape = [
+            self.batch_size,
+            self.num_frame_per_block,
+            16,
+            latent_height,
+            latent_width,
+        ]
+        self.noise_buffer = torch.empty(
+            noise_shape, dtype=generator_dtype, device=generator_device
+        )
+        self.step_noise_buffer = self.noise_buffer.new_empty(
+            [self.batch_size * self.num_frame_per_block, *noise_shape[2:]]
+        )
+        self.zero_timestep = torch.zeros(
+            [self.batch_size, max(self.local_attn_size, self.num_frame_per_block)],
+            dtype=torch.int64,
+            device=generator_device,
         )
 
-    @torch.no_grad()
+    @torch.inference_mode()
     def __call__(
         self, _: torch.Tensor | list[torch.Tensor] | None = None
     ) -> torch.Tensor:
         # Ignore input
 
-        latent_height = self.height // VAE_SPATIAL_DOWNSAMPLE_FACTOR
-        latent_width = self.width // VAE_SPATIAL_DOWNSAMPLE_FACTOR
-        generator_param = next(self.generator.model.parameters())
+        _, generator_device = self._generator_dtype_device()
 
-        # Create generator from seed for reproducible generation
+        # Reseed the generator for reproducible generation
         # Derive unique seed per block of latents using current_start as offset
         frame_seed = self.base_seed + self.current_start
-        rng = torch.Generator(device=generator_param.device).manual_seed(frame_seed)
+        if self.rng is None or self.rng.device != generator_device:
+            self.rng = torch.Generator(device=generator_device)
+        rng = self.rng.manual_seed(frame_seed)
 
-        noise = torch.randn(
-            [
-                self.batch_size,
-                self.num_frame_per_block,
-                16,
-                latent_height,
-                latent_width,
-            ],
-            device=generator_param.device,
-            dtype=generator_param.dtype,
-            generator=rng,
-        )
+        noise = self.noise_buffer.normal_(generator=rng)
 
         for index, current_timestep in enumerate(self.denoising_step_list):
-            timestep = (
-                torch.ones(
-                    [self.batch_size, self.num_frame_per_block],
-                    device=noise.device,
-                    dtype=torch.int64,
-                )
-                * current_timestep
+            timestep = torch.full(
+                [self.batch_size, self.num_frame_per_block],
+                current_timestep.item(),
+                device=noise.device,
+                # Warped denoising steps are float
+                dtype=current_timestep.dtype,
             )
 
             if index < len(self.denoising_step_list) - 1:
@@ -209,22 +242,17 @@ class InferencePipeline(torch.nn.Module):
                     current_start=self.current_start * self.frame_seq_length,
                 )
                 next_timestep = self.denoising_step_list[index + 1]
-                # Create noise with same shape and properties as denoised_pred
+                # Refill the noise with same shape and properties as denoised_pred
                 flattened_pred = denoised_pred.flatten(0, 1)
-                random_noise = torch.randn(
-                    flattened_pred.shape,
-                    device=flattened_pred.device,
-                    dtype=flattened_pred.dtype,
-                    generator=rng,
-                )
+                random_noise = self.step_noise_buffer.normal_(generator=rng)
                 noise = self.scheduler.add_noise(
                     flattened_pred,
                     random_noise,
-                    next_timestep
-                    * torch.ones(
+                    torch.full(
                         [self.batch_size * self.num_frame_per_block],
+                        next_timestep.item(),
                         device=noise.device,
-                        dtype=torch.long,
+                        dtype=next_timestep.dtype,
                     ),
                 ).unflatten(0, denoised_pred.shape[:2])
             else:
@@ -238,7 +266,7 @@ class InferencePipeline(torch.nn.Module):
                 )
 
         # rerun with clean context to update cache
-        context_timestep = torch.ones_like(timestep) * 0
+        context_timestep = self.zero_timestep[:, : self.num_frame_per_block]
         self.generator(
             noisy_image_or_video=denoised_pred,
             conditional_dict=self.conditional_dict,
@@ -249,18 +277,25 @@ class InferencePipeline(torch.nn.Module):
         )
 
         # Push the generated latents to the recache buffer (sliding window)
-        # Shift buffer left, append new frames at end
-        self.recache_buffer = torch.cat(
-            [
-                self.recache_buffer[:, self.num_frame_per_block :],
-                denoised_pred.to(self.recache_buffer.device),
-            ],
-            dim=1,
+        # Overwrite the oldest frames in place, wrapping around the end
+        buffer_size = self.recache_buffer.shape[1]
+        new_frames = denoised_pred[:, -buffer_size:]
+        num_new_frames = new_frames.shape[1]
+        num_until_end = min(num_new_frames, buffer_size - self.recache_pos)
+        self.recache_buffer[
+            :, self.recache_pos : self.recache_pos + num_until_end
+        ].copy_(new_frames[:, :num_until_end])
+        self.recache_buffer[:, : num_new_frames - num_until_end].copy_(
+            new_frames[:, num_until_end:]
         )
+        self.recache_pos = (self.recache_pos + num_new_frames) % buffer_size
 
         self.current_start += self.num_frame_per_block
 
-        output = self.vae.decode_to_pixel(denoised_pred, use_cache=True)
+        # postprocess_chunk converts to fp32 itself
+        output = self.vae.decode_to_pixel(
+            denoised_pred, use_cache=True, output_dtype=None
+        )
         return postprocess_chunk(output)
 
     def _initialize_kv_cache(
@@ -339,27 +374,35 @@ class InferencePipeline(torch.nn.Module):
                 module.max_attention_size = target_size
                 updated_modules.append(name if name else module.__class__.__name__)
 
-    def _recache_frames(self):
-        # Reset kv cache
-        for block_idx in range(self.num_transformer_blocks):
-            cache = self.kv_cache1[block_idx]
-            cache["k"].zero_()
-            cache["v"].zero_()
-
-        # Reset cross-attention cache
+    def _reset_crossattn_cache(self):
+        # The attention layers replace k and v when they fill the cache, so the
+        # tensors are collected on every reset rather than once up front
+        torch._foreach_zero_(
+            [blk[name] for blk in self.crossattn_cache for name in ("k", "v")]
+        )
         for blk in self.crossattn_cache:
-            blk["k"].zero_()
-            blk["v"].zero_()
             blk["is_init"] = False
 
+    def _recache_frames(self):
+        # Reset kv cache, zeroing all blocks with one fused op
+        torch._foreach_zero_(
+            [
+                cache[name]
+                for cache in self.kv_cache1[: self.num_transformer_blocks]
+                for name in ("k", "v")
+            ]
+        )
+
+        self._reset_crossattn_cache()
+
         # Get the number of frames to recache (min of what we've generated and buffer size)
         num_recache_frames = min(self.current_start, self.local_attn_size)
         recache_start = self.current_start - num_recache_frames
 
-        # With sliding window, most recent frames are always at the end
-        generator_device = next(self.generator.model.parameters()).device
+        # Rotate the ring so the most recent frames are at the end
+        _, generator_device = self._generator_dtype_device()
         recache_frames = (
-            self.recache_buffer[:, -num_recache_frames:]
+            self.recache_buffer.roll(-self.recache_pos, dims=1)[:, -num_recache_frames:]
             .contiguous()
             .to(generator_device)
         )
@@ -374,14 +417,7 @@ class InferencePipeline(torch.nn.Module):
         )
         self.generator.model.block_mask = block_mask
 
-        context_timestep = (
-            torch.ones(
-                [self.batch_size, num_recache_frames],
-                device=recache_frames.device,
-                dtype=torch.int64,
-            )
-            * 0
-        )
+        context_timestep = self.zero_timestep[:, :num_recache_frames]
         self.generator(
             noisy_image_or_video=recache_frames,
             conditional_dict=self.conditional_dict,
@@ -391,8 +427,4 @@ class InferencePipeline(torch.nn.Module):
             current_start=recache_start * self.frame_seq_length,
         )
 
-        # Reset cross-attention cache
-        for blk in self.crossattn_cache:
-            blk["k"].zero_()
-            blk["v"].zero_()
-            blk["is_init"] = False
+        self._reset_crossattn_cache()
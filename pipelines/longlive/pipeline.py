@@ -71,7 +71,7 @@ class LongLivePipeline(Pipeline):
         self.denoising_step_list = None
 
         # Prompt blending
-        self.prompt_blender = PromptBlender(device, dtype)
+        self.prompt_blender = PromptBlender(device, dtype, low_memory=low_memory)
 
     def prepare(self, should_prepare: bool = False, **kwargs) -> Requirements | None:
         # If caller requested prepare assume cache init
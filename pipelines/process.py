@@ -13,6 +13,11 @@ def preprocess_chunk(
     height: int | None = None,
     width: int | None = None,
 ) -> torch.Tensor:
+    # Single frames of one size, such as the views of one batched chunk produced by
+    # FrameProcessor, are converted, resized and normalized in one go
+    if chunk[0].shape[0] == 1 and all(frame.shape == chunk[0].shape for frame in chunk):
+        return _preprocess_batched_chunk(chunk, device, dtype, height, width)
+
     frames = []
 
     for frame in chunk:
@@ -49,9 +54,38 @@ def preprocess_chunk(
     return chunk / 255.0 * 2.0 - 1.0
 
 
+def _preprocess_batched_chunk(
+    chunk: list[torch.Tensor],
+    device: torch.device,
+    dtype: torch.dtype,
+    height: int | None = None,
+    width: int | None = None,
+) -> torch.Tensor:
+    frames = torch.cat(chunk).to(device=device, dtype=dtype)
+    frames = rearrange(frames, "T H W C -> T C H W")
+
+    _, _, H, W = frames.shape
+
+    if height is not None and width is not None and (H != height or W != width):
+        frames = torch.nn.functional.interpolate(
+            frames,
+            size=(height, width),
+            mode="bilinear",
+            align_corners=False,
+        )
+
+        logger.debug(f"Resized frames from {H}x{W} to {height}x{width}")
+
+    # Add a batch dim and rearrange to get a BCTHW tensor
+    chunk = rearrange(frames, "T C H W -> 1 C T H W")
+    # Normalize to [-1, 1] range
+    return chunk / 255.0 * 2.0 - 1.0
+
+
 def postprocess_chunk(chunk: torch.Tensor) -> torch.Tensor:
     # chunk is a BTCHW tensor
     # Drop the batch dim
     chunk = rearrange(chunk.squeeze(0), "T C H W -> T H W C")
-    # Normalize to [0, 1]
-    return (chunk / 2 + 0.5).clamp(0, 1).float()
+    # Normalize to [0, 1] in fp32, copying once and then working in place
+    chunk = chunk.to(torch.float32, copy=True)
+    return chunk.mul_(0.5).add_(0.5).clamp_(0, 1)